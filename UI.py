@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import multiprocessing
 from typing import Dict, Tuple, Optional
 
 import tkinter as tk
@@ -29,19 +30,16 @@ class WizardApp(tk.Tk, Step1Mixin, Step2Mixin, Step3Mixin):
         self.note_text_overrides: Dict[str, str] = {}
         self.note_fontsize_overrides: Dict[str, float] = {}
         self.ann_source_var = tk.StringVar(value="json")  # 'json' or 'gemini'
-        self.g_txt_var = tk.StringVar()
-        self.g_objective_var = tk.StringVar()
-        self.g_model_var = tk.StringVar(value="gemini-2.5-flash")
-        self.g_max_items_var = tk.IntVar(value=12)
-        self.g_outfile_var = tk.StringVar()
         self._preview_pdf_path: Optional[str] = None
         self.doc = None
-        self.page_imgs_ppm: Dict[int, bytes] = {}
-        self.page_sizes: Dict[int, Tuple[int, int]] = {}
+        self.page_count = 0
+        self.page_sizes: Dict[int, Tuple[float, float]] = {}  # PDF points
         self.cur_page = 0
 
-        self.fitz = _import_fitz()
+        self._fitz = None  # PyMuPDF, imported on first use (see fitz)
+        self._step3_built = False
         self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._index_placements()
         self._build_ui()
 
     # ---------- UI scaffold ----------
@@ -59,7 +57,24 @@ class WizardApp(tk.Tk, Step1Mixin, Step2Mixin, Step3Mixin):
 
         self._build_step1()
         self._build_step2()
-        self._build_step3()
+        # Step 3 (preview canvas, raster pool, temp dir) is built when first needed
+        self.nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    @property
+    def fitz(self):
+        # Deferred so launching the wizard for OCR alone doesn't load PyMuPDF
+        if self._fitz is None:
+            self._fitz = _import_fitz()
+        return self._fitz
+
+    def _ensure_step3(self):
+        if not self._step3_built:
+            self._step3_built = True
+            self._build_step3()
+
+    def _on_tab_changed(self, _event=None):
+        if self.nb.select() == str(self.step3):
+            self._ensure_step3()
 
 
 def main():
@@ -68,4 +83,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Only for running UI.py directly; the packaged app calls this in local_app.main()
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -18,13 +18,26 @@ Usage:
         python app.py
 
     3. Open http://127.0.0.1:5000 in your browser.
+
+    Set FLASK_DEBUG=1 for the debugger and auto-reload. For anything beyond
+    local use, serve it with several workers/threads instead, e.g.:
+        gunicorn -w 2 -k gthread --threads 4 -b 127.0.0.1:5000 font_generator:app
 """
 
+import functools
+import hashlib
+import os
 import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 import requests
-from flask import Flask, request, send_file, render_template
+from flask import Flask, request, send_file, send_from_directory, render_template, make_response
 
 # Official template from the Handwrite repo
 TEMPLATE_URL = (
@@ -38,7 +51,33 @@ UPLOAD_DIR = BASE_DIR / "uploads"
 FONT_DIR = BASE_DIR / "fonts"
 TEMPLATE_PATH = STATIC_DIR / "handwrite_template.pdf"
 
+# Resident worker processes that import handwrite once and run font builds
+# in-process, instead of starting a fresh `handwrite` interpreter per upload
+HANDWRITE_WORKERS = 2
+
+# Largest accepted upload; bigger requests are refused with 413 before any of
+# the body is read
+MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+# Read size when copying an upload to disk
+UPLOAD_CHUNK = 1 << 20
+
+# Behind a reverse proxy the file bytes can be handed to the proxy instead of
+# going through Python:
+#   FONTGEN_X_SENDFILE=1       emit X-Sendfile (Apache mod_xsendfile, lighttpd)
+#   FONTGEN_ACCEL_FONTS=/internal/fonts/
+#                              nginx: answer font downloads with X-Accel-Redirect to
+#                              this internal location, aliased to FONT_DIR
+X_SENDFILE = str(os.environ.get("FONTGEN_X_SENDFILE", "")).strip().lower() in ("1", "true", "yes")
+ACCEL_FONTS_PREFIX = str(os.environ.get("FONTGEN_ACCEL_FONTS", "")).strip()
+
 app = Flask(__name__, template_folder=str(BASE_DIR), static_folder=str(STATIC_DIR))
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+# send_file/send_from_directory read this key (Flask 3 has no app.use_x_sendfile)
+app.config["USE_X_SENDFILE"] = X_SENDFILE
+
+_handwrite_pool: Optional[ProcessPoolExecutor] = None
+_handwrite_pool_lock = threading.Lock()
+_handwrite_main = None  # handwrite.cli.main, per worker process
 
 
 def ensure_dirs() -> None:
@@ -47,23 +86,107 @@ def ensure_dirs() -> None:
         d.mkdir(parents=True, exist_ok=True)
 
 
-def ensure_template() -> None:
+def ensure_template(refresh: bool = False) -> None:
     """
     Download the Handwrite sample template if it's not already present.
+
+    With refresh=True an existing copy is revalidated against the server's ETag
+    and only re-downloaded if it changed.
     """
-    if TEMPLATE_PATH.exists():
+    if TEMPLATE_PATH.exists() and not refresh:
         return
+    TEMPLATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+    etag_path = TEMPLATE_PATH.with_suffix(".etag")
+    headers = {}
+    if TEMPLATE_PATH.exists() and etag_path.exists():
+        headers["If-None-Match"] = etag_path.read_text().strip()
 
     print(f"[INFO] Downloading template from {TEMPLATE_URL} ...")
-    resp = requests.get(TEMPLATE_URL, timeout=30)
-    resp.raise_for_status()
-    TEMPLATE_PATH.write_bytes(resp.content)
+    with requests.get(TEMPLATE_URL, stream=True, timeout=30, headers=headers) as resp:
+        if resp.status_code == 304:
+            print(f"[INFO] Template at {TEMPLATE_PATH} is up to date")
+            return
+        resp.raise_for_status()
+        # Stream to a temp name and swap it in, so an interrupted download never
+        # leaves a truncated template that the exists() check above would accept
+        part_path = TEMPLATE_PATH.with_suffix(".part")
+        with part_path.open("wb") as f:
+            for chunk in resp.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+        part_path.replace(TEMPLATE_PATH)
+        etag = resp.headers.get("ETag")
+        if etag:
+            etag_path.write_text(etag)
     print(f"[INFO] Saved template to {TEMPLATE_PATH}")
 
 
-def run_handwrite_on_scan(scan_path: Path) -> Path:
+def _init_handwrite_worker() -> None:
+    """Warm a pool worker: import handwrite (and its image stack) up front."""
+    global _handwrite_main
+    try:
+        from handwrite.cli import main
+    except ImportError:
+        return  # reported by the first job; the caller falls back to the CLI
+    _handwrite_main = main
+
+
+def _handwrite_in_worker(args: List[str]) -> None:
+    """Run `handwrite ARGS` inside a pool worker via the CLI's own entry point."""
+    global _handwrite_main
+    if _handwrite_main is None:
+        from handwrite.cli import main  # raises ImportError back to the caller
+        _handwrite_main = main
+    sys.argv = ["handwrite", *args]
+    try:
+        _handwrite_main()
+    except SystemExit as e:  # argparse errors and explicit exits
+        if e.code not in (None, 0):
+            raise RuntimeError(f"`handwrite` failed with exit code {e.code}") from None
+
+
+def _get_handwrite_pool() -> ProcessPoolExecutor:
+    global _handwrite_pool
+    with _handwrite_pool_lock:
+        if _handwrite_pool is None:
+            _handwrite_pool = ProcessPoolExecutor(
+                max_workers=HANDWRITE_WORKERS, initializer=_init_handwrite_worker
+            )
+        return _handwrite_pool
+
+
+def _reset_handwrite_pool() -> None:
+    """Drop a broken pool (a worker died); the next job starts a fresh one."""
+    global _handwrite_pool
+    with _handwrite_pool_lock:
+        _handwrite_pool = None
+
+
+def _run_handwrite_cli(cmd: List[str]) -> None:
+    """Run the `handwrite` executable from PATH as a one-off subprocess."""
+    # Blocks only this request's thread (the server is threaded); the output is
+    # captured so a failure can report what handwrite said
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise RuntimeError(
+            "The `handwrite` CLI is not in PATH. "
+            "Did you run `pip install handwrite`?"
+        )
+    except subprocess.CalledProcessError as e:
+        details = (e.stderr or e.stdout or "").strip()
+        msg = f"`handwrite` failed with exit code {e.returncode}"
+        if details:
+            msg += f": {details}"
+        raise RuntimeError(msg) from e
+
+
+def run_handwrite_on_scan(scan_path: Path, family: Optional[str] = None) -> Path:
     """
-    Run the `handwrite` CLI on the uploaded scan and return the .ttf path.
+    Run `handwrite` on the uploaded scan and return the .ttf path.
+
+    The job runs in a resident worker process (see HANDWRITE_WORKERS), falling
+    back to the `handwrite` executable if the package can't be imported here.
 
     The `handwrite` CLI signature (from handwrite.cli:main) is roughly:
 
@@ -74,12 +197,14 @@ def run_handwrite_on_scan(scan_path: Path) -> Path:
             [--family FAMILY_NAME]
             [--style STYLE_NAME]
 
-    We set `--filename` so we know the resulting .ttf name.
+    We set `--filename` so we know the resulting .ttf name. The font is named
+    after the scan file; `family` (default: the same name) goes inside it.
     """
     scan_path = scan_path.resolve()
     FONT_DIR.mkdir(parents=True, exist_ok=True)
 
     font_basename = scan_path.stem  # e.g. "my_scan"
+    family = family or font_basename
     output_ttf = FONT_DIR / f"{font_basename}.ttf"
 
     cmd = [
@@ -89,53 +214,93 @@ def run_handwrite_on_scan(scan_path: Path) -> Path:
         "--filename",
         font_basename,            # base name for the font file
         "--family",
-        font_basename,            # family name inside the font
+        family,                   # family name inside the font
         "--style",
         "Regular",                # style name
     ]
 
     print(f"[INFO] Running: {' '.join(cmd)}")
     try:
-        subprocess.run(cmd, check=True)
-    except FileNotFoundError:
-        raise RuntimeError(
-            "The `handwrite` CLI is not in PATH. "
-            "Did you run `pip install handwrite`?"
-        )
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"`handwrite` failed with exit code {e.returncode}") from e
-
-    if not output_ttf.exists():
-        # Fallback: if something changed in handwrite, list the FONT_DIR contents
-        candidates = list(FONT_DIR.glob("*.ttf"))
-        if not candidates:
-            raise RuntimeError(
-                "Font generation seemed to run, but no .ttf file was found "
-                f"in {FONT_DIR}"
-            )
-        # Just pick the most recently modified .ttf
-        candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-        return candidates[0]
+        _get_handwrite_pool().submit(_handwrite_in_worker, cmd[1:]).result()
+    except ImportError:
+        # handwrite isn't importable by this interpreter (e.g. installed with
+        # pipx); the CLI on PATH may still work
+        _run_handwrite_cli(cmd)
+    except BrokenProcessPool as e:
+        _reset_handwrite_pool()
+        raise RuntimeError("The handwrite worker process crashed") from e
+
+    if output_ttf.exists():
+        return output_ttf
+
+    # Fallback: if something changed in handwrite, try the names it might use
+    # for this font. FONT_DIR is shared by all uploads, so never pick another file.
+    for name in (f"{font_basename}-Regular.ttf", f"{font_basename} Regular.ttf"):
+        candidate = FONT_DIR / name
+        if candidate.exists():
+            return candidate
+
+    raise RuntimeError(
+        "Font generation seemed to run, but no .ttf file was found "
+        f"in {FONT_DIR}"
+    )
+
+
+def send_font(font_path: Path, download_name: str):
+    """Font download response; nginx serves the bytes when FONTGEN_ACCEL_FONTS is set."""
+    if ACCEL_FONTS_PREFIX and font_path.parent == FONT_DIR:
+        resp = make_response("")
+        resp.headers["X-Accel-Redirect"] = ACCEL_FONTS_PREFIX.rstrip("/") + "/" + font_path.name
+        resp.headers["Content-Type"] = "font/ttf"
+        # Let Werkzeug quote/encode the user-supplied name
+        resp.headers.set("Content-Disposition", "attachment", filename=download_name)
+        return resp
+    return send_file(
+        font_path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype="font/ttf",
+    )
+
 
-    return output_ttf
+@functools.lru_cache(maxsize=1)
+def _index_page() -> Tuple[bytes, str]:
+    """font_page.html has no template variables: render it once, with its ETag."""
+    body = render_template("font_page.html").encode("utf-8")
+    return body, hashlib.sha1(body).hexdigest()
 
 
 @app.route("/", methods=["GET"])
 def index():
-    return render_template("font_page.html")
+    body, etag = _index_page()
+    resp = make_response(body)
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 300
+    # 304 with no body when the browser already has this page
+    return resp.make_conditional(request)
 
 
 @app.route("/template", methods=["GET"])
 def template_pdf():
     """
     Serve the template PDF for download.
+
+    Conditional (ETag/Last-Modified) and cacheable for a day, so repeat
+    downloads are answered with 304 and no body.
     """
-    return send_file(
-        TEMPLATE_PATH,
+    ensure_template()  # no-op once downloaded; needed when not started via __main__
+    resp = send_from_directory(
+        STATIC_DIR,
+        TEMPLATE_PATH.name,
         as_attachment=True,
         download_name="handwrite_template.pdf",
         mimetype="application/pdf",
+        conditional=True,
+        max_age=86400,
     )
+    resp.cache_control.public = True
+    return resp
 
 
 @app.route("/upload", methods=["POST"])
@@ -147,27 +312,55 @@ def upload_scan():
     if not file or file.filename == "":
         return "No file uploaded", 400
 
-    # Save uploaded file
     safe_name = file.filename.replace("/", "_").replace("\\", "_")
-    dest_path = UPLOAD_DIR / safe_name
-    file.save(dest_path)
-
-    try:
-        font_path = run_handwrite_on_scan(dest_path)
-    except Exception as e:
-        # In a real app, log the traceback; here we just return the message.
-        return f"Error while generating font: {e}", 500
+    name = Path(safe_name).stem or "handwriting"
+    suffix = Path(safe_name).suffix
+
+    # Save uploaded file, hashing it on the way. The digest (which also covers the
+    # family name written into the font) names both the scan and its font, so a
+    # repeat upload is answered from FONT_DIR without running handwrite again.
+    digest = hashlib.sha256()
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, suffix=suffix, delete=False) as out:
+        while True:
+            chunk = file.stream.read(UPLOAD_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    digest.update(name.encode("utf-8"))
+    key = digest.hexdigest()[:16]
+
+    font_path = FONT_DIR / f"{key}.ttf"
+    if font_path.exists():
+        os.remove(out.name)
+    else:
+        # handwrite names its output after the scan, and the temporary scan name is
+        # unique per request, so identical uploads running at once never write the
+        # same file; the finished font is then moved to its cache key atomically.
+        try:
+            built_path = run_handwrite_on_scan(Path(out.name), family=name)
+            os.replace(built_path, font_path)
+        except Exception as e:
+            # In a real app, log the traceback; here we just return the message.
+            return f"Error while generating font: {e}", 500
+        finally:
+            os.replace(out.name, UPLOAD_DIR / f"{key}{suffix}")
 
     # Return the TTF for download
-    return send_file(
-        font_path,
-        as_attachment=True,
-        download_name=font_path.name,
-        mimetype="font/ttf",
-    )
+    return send_font(font_path, f"{name}.ttf")
 
 
 if __name__ == "__main__":
     ensure_dirs()
-    ensure_template()
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    try:
+        # Revalidate a downloaded copy against the server's ETag (304 when unchanged)
+        ensure_template(refresh=True)
+    except requests.RequestException as e:
+        if not TEMPLATE_PATH.exists():
+            raise
+        print(f"[WARN] Could not check the template for updates: {e}")
+    debug = str(os.environ.get("FLASK_DEBUG", "")).strip().lower() in ("1", "true", "yes")
+    # One thread per request: a long `handwrite` run doesn't hold up the page or
+    # template downloads
+    app.run(host="127.0.0.1", port=5000, debug=debug, threaded=True)
@@ -1,5 +1,11 @@
+import functools
+import hashlib
+import json
 import os
 import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 import sys
@@ -83,8 +89,6 @@ def _discover_bundled_ghostscript() -> Optional[Path]:
             continue
     return None
 
-import ocrmypdf
-
 # from modern_main import DEBUG
 
 def ensure_tesseract_available(custom_tesseract_path: str | None = None) -> None:
@@ -193,31 +197,33 @@ def ensure_ghostscript_available() -> None:
         )
 
 
+@functools.lru_cache(maxsize=1)
+def _ocrmypdf():
+    """Import OCRmyPDF on first use; it pulls in pikepdf, PIL and friends, which
+    would otherwise delay the UI even when no OCR is run."""
+    import ocrmypdf
+    return ocrmypdf
+
+
+@functools.lru_cache(maxsize=1)
 def _remove_background_supported() -> bool:
-    return hasattr(ocrmypdf, "remove_background")
+    try:
+        return hasattr(_ocrmypdf(), "remove_background")
+    except ImportError:
+        return False
 
 # if DEBUG == True:
 #     progress_bar = True
 # else:
 #     progress_bar = False
 
-def run_ocr(
-    input_pdf: str,
-    output_pdf: Optional[str] = None,
-    languages: str = "eng",
-    force: bool = False,
-    optimize: int = 0,
-    deskew: bool = True,
-    clean: bool = False,
-    custom_tesseract_path: str | None = None,
-) -> str:
-    ensure_tesseract_available(custom_tesseract_path)
-    ensure_ghostscript_available()
-    out_path = output_pdf or str(Path(input_pdf).with_suffix(".ocr.pdf"))
+@contextmanager
+def _hide_child_consoles():
+    """Temporarily hide child consoles on Windows while running the OCR pipeline.
 
-    # Temporarily hide child consoles on Windows while running OCR pipeline.
-    # Patch subprocess at runtime and also ocrmypdf's module tree to catch
-    # "from subprocess import Popen" aliases.
+    Patches subprocess at runtime and also ocrmypdf's module tree to catch
+    "from subprocess import Popen" aliases; everything is restored on exit.
+    """
     CREATE_NO_WINDOW = 0x08000000
 
     def _wrap_subprocess_call(fn):
@@ -284,21 +290,7 @@ def run_ocr(
             except Exception:
                 continue
 
-        # Run OCR
-        ocrmypdf.ocr(
-        input_pdf,
-        out_path,
-        language=languages,
-        force_ocr=force,
-        # Skip pages that already contain text unless forcing re-OCR
-        skip_text=not force,
-        optimize=optimize,
-        deskew=deskew,
-        remove_background=clean,
-        color_conversion_strategy="RGB",
-        # Silence rich progress output in terminal
-        progress_bar=False,
-        )
+        yield
     finally:
         # Restore subprocess
         try:
@@ -319,4 +311,193 @@ def run_ocr(
                 setattr(target, attr, orig)
             except Exception:
                 pass
+
+
+def _usable_cpus() -> int:
+    """CPUs this process may run on; unlike os.cpu_count() this honours affinity
+    masks and container cpusets, so OCR doesn't start more workers than it can use."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:  # not available on Windows/macOS
+        return max(1, os.cpu_count() or 1)
+
+
+def _init_ocr_worker() -> None:
+    # Runs in a pool worker, so the process-wide variable only affects that worker's
+    # Tesseract runs. One Tesseract thread each, as the pool (or OCRmyPDF's own jobs)
+    # already covers the cores; a value set by the user still wins.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _ocr_chunk(chunk_in: str, chunk_out: str, options: dict, jobs: int = 1) -> str:
+    """OCR one page-range chunk (or a whole file) inside a pool worker."""
+    ocrmypdf = _ocrmypdf()
+    with _hide_child_consoles():
+        ocrmypdf.ocr(chunk_in, chunk_out, jobs=jobs, **options)
+    return chunk_out
+
+
+def _run_ocr_parallel(input_pdf: str, out_path: str, options: dict) -> bool:
+    """Split input_pdf into page ranges, OCR them in a process pool and merge.
+
+    The merged file is a plain PDF (not PDF/A); the input's metadata, outline
+    and page labels are copied onto it.
+
+    Returns False (without doing any work) when the document is too short
+    to be worth splitting, so the caller can fall back to a single run.
+    """
+    from highlights import _import_fitz
+
+    fitz = _import_fitz()
+    workers = _usable_cpus()
+    with fitz.open(input_pdf) as src:
+        page_count = src.page_count
+        if workers < 2 or page_count < 2:
+            return False
+        n_chunks = min(workers, page_count)
+        per_chunk = -(-page_count // n_chunks)  # ceil division
+        with tempfile.TemporaryDirectory(prefix="anny-ocr-") as tmpdir:
+            chunks: list[tuple[str, str]] = []
+            for start in range(0, page_count, per_chunk):
+                stop = min(start + per_chunk, page_count) - 1
+                chunk_in = os.path.join(tmpdir, f"chunk_{start:05d}.pdf")
+                chunk_out = os.path.join(tmpdir, f"chunk_{start:05d}.ocr.pdf")
+                with fitz.open() as part:
+                    part.insert_pdf(src, from_page=start, to_page=stop)
+                    part.save(chunk_in)
+                chunks.append((chunk_in, chunk_out))
+
+            # Chunks are merged with PyMuPDF below, so skip the per-chunk PDF/A pass.
+            chunk_options = {**options, "output_type": "pdf"}
+            with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_ocr_worker) as pool:
+                futures = [pool.submit(_ocr_chunk, cin, cout, chunk_options) for cin, cout in chunks]
+                results = [f.result() for f in futures]
+
+            with fitz.open() as merged:
+                for chunk_out in results:
+                    with fitz.open(chunk_out) as part:
+                        merged.insert_pdf(part)
+                # insert_pdf copies pages only; carry the document-level parts over from the input
+                merged.set_metadata(src.metadata or {})
+                merged.set_toc(src.get_toc(simple=False))
+                labels = src.get_page_labels()
+                if labels:
+                    merged.set_page_labels(labels)
+                merged.save(out_path, garbage=3, deflate=True)
+    return True
+
+
+def _ocr_cache_dir() -> Path:
+    """Per-user cache for OCR run stamps, kept out of the folders the PDFs are written to.
+
+    %APPDATA%/Annotate/ocr-cache on Windows (next to settings.json), otherwise
+    $XDG_CACHE_HOME/annotate/ocr (default ~/.cache/annotate/ocr).
+    """
+    appdata = os.environ.get("APPDATA")
+    if appdata:
+        return Path(appdata) / "Annotate" / "ocr-cache"
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "annotate" / "ocr"
+
+
+def _ocr_stamp_path(out_path: str) -> Path:
+    key = hashlib.sha1(os.path.abspath(out_path).encode("utf-8")).hexdigest()
+    return _ocr_cache_dir() / f"{key}.json"
+
+
+def _ocr_fingerprint(
+    input_pdf: str, options: dict, parallel_pages: bool, tesseract_path: Optional[str]
+) -> Optional[dict]:
+    """Identity of an OCR run: the input file (path, size, mtime) and the options that
+    shape the output. None if the input can't be stat'ed.
+
+    parallel_pages is part of it because that path writes a plain merged PDF rather
+    than OCRmyPDF's PDF/A; so is the chosen Tesseract binary.
+    """
+    try:
+        st = os.stat(input_pdf)
+    except OSError:
+        return None
+    return {
+        "input": [os.path.abspath(input_pdf), st.st_size, st.st_mtime_ns],
+        "options": dict(options),
+        "parallel_pages": bool(parallel_pages),
+        "tesseract": os.path.abspath(tesseract_path) if tesseract_path else None,
+    }
+
+
+def _ocr_output_current(out_path: str, fingerprint: Optional[dict]) -> bool:
+    """True if out_path was produced by a run with this fingerprint and is untouched since."""
+    if fingerprint is None:
+        return False
+    try:
+        stamp = json.loads(_ocr_stamp_path(out_path).read_text(encoding="utf-8"))
+        st = os.stat(out_path)
+    except (OSError, RuntimeError, ValueError):  # RuntimeError: no home directory
+        return False
+    return stamp == {**fingerprint, "output": [st.st_size, st.st_mtime_ns]}
+
+
+def _write_ocr_stamp(out_path: str, fingerprint: Optional[dict]) -> None:
+    if fingerprint is None:
+        return
+    try:
+        st = os.stat(out_path)
+        stamp_path = _ocr_stamp_path(out_path)
+        stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        stamp_path.write_text(
+            json.dumps({**fingerprint, "output": [st.st_size, st.st_mtime_ns]}), encoding="utf-8")
+    except (OSError, RuntimeError):
+        pass  # only a cache; the next run simply OCRs again
+
+
+def run_ocr(
+    input_pdf: str,
+    output_pdf: Optional[str] = None,
+    languages: str = "eng",
+    force: bool = False,
+    optimize: int = 0,
+    deskew: bool = True,
+    clean: bool = False,
+    custom_tesseract_path: str | None = None,
+    parallel_pages: bool = False,
+    single_thread_tesseract: bool = False,
+) -> str:
+    out_path = output_pdf or str(Path(input_pdf).with_suffix(".ocr.pdf"))
+
+    options = dict(
+        language=languages,
+        force_ocr=force,
+        # Skip pages that already contain text unless forcing re-OCR
+        skip_text=not force,
+        optimize=optimize,
+        deskew=deskew,
+        # Cached probe; "Clean background" can be ticked before Step 1's async check lands
+        remove_background=clean and _remove_background_supported(),
+        color_conversion_strategy="RGB",
+        # Silence rich progress output in terminal
+        progress_bar=False,
+    )
+
+    # OCR is by far the slowest step: reuse the previous output for the same input/options
+    fingerprint = _ocr_fingerprint(input_pdf, options, parallel_pages, custom_tesseract_path)
+    if _ocr_output_current(out_path, fingerprint):
+        return out_path
+    ensure_tesseract_available(custom_tesseract_path)
+    ensure_ghostscript_available()
+
+    # Split into page ranges and OCR each in its own process (one Tesseract per core)
+    if not (parallel_pages and _run_ocr_parallel(input_pdf, out_path, options)):
+        if single_thread_tesseract:
+            # OCRmyPDF gives each Tesseract max(1, min(3, jobs // pages)) threads, which
+            # suits short documents; forcing 1 only helps when that still oversubscribes.
+            # OMP_THREAD_LIMIT is process-wide, so it is set in a one-off worker, never
+            # here where concurrent server jobs would share it.
+            with ProcessPoolExecutor(max_workers=1, initializer=_init_ocr_worker) as pool:
+                pool.submit(_ocr_chunk, input_pdf, out_path, options, _usable_cpus()).result()
+        else:
+            # Run OCR (imported before patching so _hide_child_consoles sees its modules)
+            ocrmypdf = _ocrmypdf()
+            with _hide_child_consoles():
+                ocrmypdf.ocr(input_pdf, out_path, jobs=_usable_cpus(), **options)
+    _write_ocr_stamp(out_path, fingerprint)
     return out_path
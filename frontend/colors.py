@@ -1,27 +1,15 @@
-import json
-from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict
 
-
-def _tk_color(s: Optional[str], default: str = "#ff9800") -> str:
-    if not s:
-        return default
-    s = s.strip()
-    if s.startswith("#") and len(s) == 7:
-        return s
-    return s
+from highlights import load_annotation_colors
 
 
 def build_color_map(annotations_json_path: str, fallback: str = "#ff9800") -> Dict[str, str]:
-    p = Path(annotations_json_path)
-    data = json.loads(p.read_text(encoding="utf-8"))
-    if isinstance(data, dict):
-        data = [data]
-    cmap: Dict[str, str] = {}
-    for row in data:
-        if not isinstance(row, dict):
-            continue
-        q = (row.get("quote") or row.get("query") or "").strip()
-        if q:
-            cmap[q] = _tk_color(row.get("color"), fallback)
-    return cmap
\ No newline at end of file
+    """Color map from the annotations JSON.
+    Colors come from the engine's cached parse, so the preview and export builds
+    don't parse the file a second time.
+    """
+    cmap = load_annotation_colors(annotations_json_path)
+    for q, c in cmap.items():
+        # Tk accepts both "#rrggbb" and color names, so only whitespace needs trimming
+        cmap[q] = c.strip() if c else fallback
+    return cmap
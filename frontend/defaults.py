@@ -31,8 +31,19 @@ DEFAULTS = {
     "gemini_api_key": "",
 }
 
+# Preview raster zoom: pages are fit to the canvas width, between MIN_SCALE and SCALE.
 SCALE = 1.5
+MIN_SCALE = 0.5
+# Number of rasterized preview pages kept in memory (current page + neighbors).
+PAGE_CACHE_SIZE = 8
+# Number of recent preview PDFs kept on disk, so returning to an earlier layout skips the rebuild.
+PREVIEW_CACHE_SIZE = 8
+# Preview pages are rasterized in horizontal bands of this many pixels, only where visible.
+TILE_HEIGHT = 512
 # Default off: rebuilding the full PDF on every drag makes the UI feel choppy
 # and can also cause the layout engine to re-evaluate placements. Users can
 # still click the "Refresh preview" button to rebuild when ready.
 AUTO_REFRESH_AFTER_DRAG = True
+# Off by default: when on, auto-refresh after rotation-only edits just redraws the
+# rotated outlines over the current preview instead of rebuilding the PDF.
+FAST_ROTATE_PREVIEW = False
@@ -31,8 +31,10 @@ class Step1Mixin:
 
         self.force_var = tk.BooleanVar(value=False)
         self.deskew_var = tk.BooleanVar(value=True)
-        self.clean_var = tk.BooleanVar(value=_remove_background_supported())
+        self.clean_var = tk.BooleanVar(value=True)
         self.optimize_var = tk.IntVar(value=0)
+        self.parallel_var = tk.BooleanVar(value=False)
+        self.single_thread_var = tk.BooleanVar(value=False)
 
         ttk.Checkbutton(self.step1, text="Force OCR (re-OCR pages with text)", variable=self.force_var)\
             .grid(row=3, column=1, sticky="w", **pad)
@@ -40,31 +42,47 @@ class Step1Mixin:
             .grid(row=4, column=1, sticky="w", **pad)
         self.clean_chk = ttk.Checkbutton(self.step1, text="Clean background", variable=self.clean_var)
         self.clean_chk.grid(row=5, column=1, sticky="w", **pad)
-        if not _remove_background_supported():
-            self.clean_var.set(False)
-            self.clean_chk.state(["disabled"])
-            ttk.Label(self.step1, text="(not supported by your OCRmyPDF version)", foreground="gray")\
-                .grid(row=5, column=2, sticky="w", **pad)
+        # Assume supported; importing OCRmyPDF to check is slow, so probe off the Tk thread
+        threading.Thread(target=self._probe_clean_support, daemon=True).start()
 
-        tk.Label(self.step1, text="Optimize (0–3):").grid(row=6, column=0, sticky="e", **pad)
+        perf = ttk.Frame(self.step1)
+        perf.grid(row=6, column=1, sticky="w", **pad)
+        ttk.Checkbutton(perf, text="Parallel pages (one OCR process per core; output is not PDF/A)", variable=self.parallel_var)\
+            .pack(side="left")
+        ttk.Checkbutton(perf, text="Single-thread Tesseract", variable=self.single_thread_var)\
+            .pack(side="left", padx=(12, 0))
+
+        tk.Label(self.step1, text="Optimize (0–3):").grid(row=7, column=0, sticky="e", **pad)
         tk.Spinbox(self.step1, from_=0, to=3, textvariable=self.optimize_var, width=5)\
-            .grid(row=6, column=1, sticky="w", **pad)
+            .grid(row=7, column=1, sticky="w", **pad)
 
-        tk.Label(self.step1, text="Tesseract path (optional):").grid(row=7, column=0, sticky="e", **pad)
+        tk.Label(self.step1, text="Tesseract path (optional):").grid(row=8, column=0, sticky="e", **pad)
         self.tess_var = tk.StringVar()
-        tk.Entry(self.step1, textvariable=self.tess_var, width=70).grid(row=7, column=1, **pad)
-        ttk.Button(self.step1, text="Find...", command=self._browse_tesseract).grid(row=7, column=2, **pad)
+        tk.Entry(self.step1, textvariable=self.tess_var, width=70).grid(row=8, column=1, **pad)
+        ttk.Button(self.step1, text="Find...", command=self._browse_tesseract).grid(row=8, column=2, **pad)
 
         self.ocr_status = tk.StringVar(value="Idle")
-        tk.Label(self.step1, textvariable=self.ocr_status, fg="gray").grid(row=8, column=0, columnspan=3, sticky="w", padx=12, pady=(0, 6))
+        tk.Label(self.step1, textvariable=self.ocr_status, fg="gray").grid(row=9, column=0, columnspan=3, sticky="w", padx=12, pady=(0, 6))
         self.ocr_prog = ttk.Progressbar(self.step1, mode="indeterminate")
-        self.ocr_prog.grid(row=9, column=0, columnspan=3, sticky="we", padx=12, pady=(0, 12))
+        self.ocr_prog.grid(row=10, column=0, columnspan=3, sticky="we", padx=12, pady=(0, 12))
 
         bar = ttk.Frame(self.step1)
-        bar.grid(row=10, column=0, columnspan=3, sticky="e", padx=12, pady=(4, 12))
+        bar.grid(row=11, column=0, columnspan=3, sticky="e", padx=12, pady=(4, 12))
         ttk.Button(bar, text="Run OCR", command=self._run_ocr_clicked).pack(side="left", padx=6)
         ttk.Button(bar, text="Skip OCR → Next", command=lambda: self.nb.select(self.step2)).pack(side="left", padx=6)
 
+    def _probe_clean_support(self):
+        supported = _remove_background_supported()
+        self.after(0, lambda s=supported: self._apply_clean_support(s))
+
+    def _apply_clean_support(self, supported: bool):
+        if supported:
+            return
+        self.clean_var.set(False)
+        self.clean_chk.state(["disabled"])
+        ttk.Label(self.step1, text="(not supported by your OCRmyPDF version)", foreground="gray")\
+            .grid(row=5, column=2, sticky="w", padx=8, pady=6)
+
     def _browse_in_pdf(self):
         p = filedialog.askopenfilename(title="Choose input PDF", filetypes=[("PDF files", "*.pdf")])
         if p:
@@ -109,6 +127,8 @@ class Step1Mixin:
                     deskew=self.deskew_var.get(),
                     clean=self.clean_var.get(),
                     custom_tesseract_path=(self.tess_var.get().strip() or None),
+                    parallel_pages=self.parallel_var.get(),
+                    single_thread_tesseract=self.single_thread_var.get(),
                 )
             except Exception as e:
                 err_msg = f"{type(e).__name__}: {e}"
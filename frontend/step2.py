@@ -1,7 +1,9 @@
+import functools
 import json
 import os
 from pathlib import Path
 import tempfile
+import threading
 from typing import Dict, Tuple, List, Optional
 
 import tkinter as tk
@@ -21,6 +23,37 @@ except Exception as _e:  # pragma: no cover - optional dependency
     _GEMINI_IMPORT_ERR = str(_e)
 
 
+def _strip_or(default, s: str | None):
+    """Stripped text, or default when it's empty."""
+    return (s or "").strip() or default
+
+
+_none_if_empty = functools.partial(_strip_or, None)
+
+# (setting name, Tk variable attribute, converter) read by _gather_settings
+_SETTINGS_SPEC = (
+    ("note_width", "note_width_var", int),
+    ("min_note_width", "min_width_var", int),
+    ("note_fontsize", "fontsize_var", float),
+    ("note_fill", "note_fill_var", _none_if_empty),
+    ("note_border", "note_border_var", _none_if_empty),
+    ("note_border_width", "note_border_width_var", int),
+    ("note_text", "note_text_var", functools.partial(_strip_or, "red")),
+    ("text_markup_style", "text_markup_style_var",
+     functools.partial(_strip_or, DEFAULTS.get("text_markup_style", "highlight"))),
+    ("draw_leader", "draw_leader_var", bool),
+    ("leader_color", "leader_color_var", _none_if_empty),
+    ("allow_column_footer", "col_footer_var", bool),
+    ("column_footer_max_offset", "col_footer_max_var", int),
+    ("max_vertical_offset", "max_vert_var", int),
+    ("max_scan", "max_scan_var", int),
+    ("side", "side_var", str),
+    ("allow_center_gutter", "center_gutter_var", bool),
+    ("center_gutter_tolerance", "center_tol_var", float),
+    ("note_fontfile", "fontfile_var", _none_if_empty),
+)
+
+
 class Step2Mixin:
         # ---------- STEP 2: Settings ----------
         def _build_step2(self):
@@ -51,6 +84,12 @@ class Step2Mixin:
             self.gemini_panel = ttk.LabelFrame(self.step2, text="Gemini annotator")
             self.gemini_panel.grid(row=row, column=0, columnspan=3, sticky="we", padx=8)
             # No TXT selection; extraction happens automatically from current PDF
+            # Gemini vars live with the widgets they back (like json_var above)
+            self.g_txt_var = tk.StringVar()
+            self.g_objective_var = tk.StringVar()
+            self.g_model_var = tk.StringVar(value="gemini-2.5-flash")
+            self.g_max_items_var = tk.IntVar(value=12)
+            self.g_outfile_var = tk.StringVar()
             ttk.Label(self.gemini_panel, text="Objective:").grid(row=0, column=0, sticky="e", **pad)
             tk.Entry(self.gemini_panel, textvariable=self.g_objective_var, width=70).grid(row=0, column=1, columnspan=2, sticky="w", **pad)
             # Model & count
@@ -150,7 +189,10 @@ class Step2Mixin:
     
             bar = ttk.Frame(self.step2)
             bar.grid(row=row + 3, column=0, columnspan=3, sticky="e", padx=12, pady=12)
-            ttk.Button(bar, text="Compute Preview", command=self._compute_preview_clicked).pack(side="left", padx=6)
+            self.plan_prog = ttk.Progressbar(bar, mode="indeterminate", length=80)
+            self.plan_prog.pack(side="left", padx=6)
+            self.plan_btn = ttk.Button(bar, text="Compute Preview", command=self._compute_preview_clicked)
+            self.plan_btn.pack(side="left", padx=6)
             ttk.Button(bar, text="Next → Preview", command=lambda: self.nb.select(self.step3)).pack(side="left", padx=6)
     
         def _browse_json(self):
@@ -256,32 +298,10 @@ class Step2Mixin:
             messagebox.showinfo("Done", f"Generated annotations JSON:\n{outfile}")
     
         def _gather_settings(self):
-            def none_if_empty(s: str | None):
-                s = (s or "").strip()
-                return None if s == "" else s
-    
-            return dict(
-                note_width=int(self.note_width_var.get()),
-                min_note_width=int(self.min_width_var.get()),
-                note_fontsize=float(self.fontsize_var.get()),
-                note_fill=none_if_empty(self.note_fill_var.get()),
-                note_border=none_if_empty(self.note_border_var.get()),
-                note_border_width=int(self.note_border_width_var.get()),
-                note_text=self.note_text_var.get().strip() or "red",
-                text_markup_style=self.text_markup_style_var.get().strip() or DEFAULTS.get("text_markup_style", "highlight"),
-                draw_leader=bool(self.draw_leader_var.get()),
-                leader_color=none_if_empty(self.leader_color_var.get()),
-                allow_column_footer=bool(self.col_footer_var.get()),
-                column_footer_max_offset=int(self.col_footer_max_var.get()),
-                max_vertical_offset=int(self.max_vert_var.get()),
-                max_scan=int(self.max_scan_var.get()),
-                side=self.side_var.get(),
-                allow_center_gutter=bool(self.center_gutter_var.get()),
-                center_gutter_tolerance=float(self.center_tol_var.get()),
-                dedupe_scope="page",
-                note_fontname=DEFAULTS.get("note_fontname", "AnnotateNote"),
-                note_fontfile=self.fontfile_var.get().strip() or None,
-            )
+            settings = {name: conv(getattr(self, attr).get()) for name, attr, conv in _SETTINGS_SPEC}
+            settings["dedupe_scope"] = "page"
+            settings["note_fontname"] = DEFAULTS.get("note_fontname", "AnnotateNote")
+            return settings
     
         def _compute_preview_clicked(self):
             if not (self.ocr_pdf or self.src_pdf):
@@ -302,27 +322,45 @@ class Step2Mixin:
             self.ann_json = self.json_var.get().strip()
             self.color_map = build_color_map(self.ann_json, fallback="#ff9800")
             settings = self._gather_settings()
+            ann_json = self.ann_json
+            # Planning runs the full layout pass; keep it off the Tk thread
+            self.plan_btn.state(["disabled"])
+            self.plan_prog.start(10)
     
-            try:
-                _, hits, notes, skipped, placements = highlight_and_margin_comment_pdf(
-                    pdf_path=pdf_path,
-                    queries=[],
-                    comments={},
-                    annotations_json=self.ann_json,
-                    plan_only=True,
-                    **settings,
-                )
-            except Exception as e:
-                messagebox.showerror("Preview failed", f"{type(e).__name__}: {e}")
-                return
+            def worker():
+                try:
+                    _, hits, notes, skipped, placements = highlight_and_margin_comment_pdf(
+                        pdf_path=pdf_path,
+                        queries=[],
+                        comments={},
+                        annotations_json=ann_json,
+                        plan_only=True,
+                        **settings,
+                    )
+                except Exception as e:
+                    err_msg = f"{type(e).__name__}: {e}"
+                    self.after(0, lambda m=err_msg: self._plan_ready(error=m))
+                    return
+                self.after(0, lambda r=(hits, notes, skipped, placements): self._plan_ready(result=r))
+    
+            threading.Thread(target=worker, daemon=True).start()
     
+        def _plan_ready(self, result: Optional[tuple] = None, error: Optional[str] = None):
+            self.plan_prog.stop()
+            self.plan_btn.state(["!disabled"])
+            if error:
+                messagebox.showerror("Preview failed", error)
+                return
+            hits, notes, skipped, placements = result
             self.placements = placements
+            self._index_placements()
             self.fixed_overrides = {}  # reset
     
-            # Build exact preview PDF and rasterize it
-            self._build_exact_preview_pdf()
+            # Build exact preview PDF in the background; it is drawn once ready
             self.cur_page = 0
-            self._draw_page()
+            self._build_exact_preview_pdf()
             self.nb.select(self.step3)
-            messagebox.showinfo("Preview ready", f"Found {hits} highlights, {notes} notes (skipped {skipped}).")
+            # Queued behind the tab switch's redraw, so Step 3 paints before the modal box
+            self.after_idle(lambda: messagebox.showinfo(
+                "Preview ready", f"Found {hits} highlights, {notes} notes (skipped {skipped})."))
     
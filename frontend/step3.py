@@ -1,15 +1,148 @@
+import bisect
+import functools
+import hashlib
+import json
 import math
 import os
+import re
+import shutil
 import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
 
-from highlights import highlight_and_margin_comment_pdf
+from highlights import highlight_and_margin_comment_pdf, RenderCancelled
 from .colors import build_color_map
-from .defaults import DEFAULTS, SCALE, AUTO_REFRESH_AFTER_DRAG
+from .defaults import (DEFAULTS, SCALE, MIN_SCALE, AUTO_REFRESH_AFTER_DRAG, FAST_ROTATE_PREVIEW, PAGE_CACHE_SIZE,
+                       TILE_HEIGHT, PREVIEW_CACHE_SIZE)
+
+# Optional Pillow fast path: hand raw pixmap samples to Tk without a PPM round-trip
+_PIL_AVAILABLE = True
+try:
+    from PIL import Image, ImageTk
+except Exception:  # pragma: no cover - optional dependency
+    _PIL_AVAILABLE = False
+
+
+# Characters that stop a value being brace-quoted into a Tcl script verbatim; anything
+# else (spaces, $, [ ...) is literal inside {...}, e.g. colors like "light blue"
+_TCL_UNSAFE_WORD = re.compile(r"[{}\\]")
+
+# Fitted preview zoom is quantized to 1/_SCALE_STEPS (see _fit_scale)
+_SCALE_STEPS = 32
+
+# Cell size (canvas px) of the uniform grid used to hit-test notes
+_NOTE_GRID = 64
+
+
+@functools.lru_cache(maxsize=256)
+def _cos_sin(ang_deg: float) -> Tuple[float, float]:
+    """(cos, sin) of an angle in degrees, cached: notes mostly share a handful of
+    rotations, and redraws ask for the same ones again."""
+    rad = ang_deg * math.pi / 180.0
+    return math.cos(rad), math.sin(rad)
+
+
+def _rotated_corners(x0: float, y0: float, x1: float, y1: float, c: float, s: float) -> List[float]:
+    """Flat [x, y, ...] corners of rect (x0, y0, x1, y1) rotated by (c, s) about its centre,
+    in (x0,y0), (x1,y0), (x1,y1), (x0,y1) order."""
+    cx, cy = 0.5 * (x0 + x1), 0.5 * (y0 + y1)
+    hw, hh = 0.5 * (x1 - x0), 0.5 * (y1 - y0)
+    # rotated half-width and half-height vectors; each corner is centre +/- both
+    ax, ay = c * hw, s * hw
+    bx, by = -s * hh, c * hh
+    return [cx - ax - bx, cy - ay - by, cx + ax - bx, cy + ay - by,
+            cx + ax + bx, cy + ay + by, cx - ax + bx, cy - ay + by]
+
+
+def _near_rect(rect, x, y, tol):
+    """True if (x, y) lies within tol of the axis-aligned rect (x0, y0, x1, y1)."""
+    if rect is None:
+        return False
+    x0, y0, x1, y1 = rect
+    return x0 - tol <= x <= x1 + tol and y0 - tol <= y <= y1 + tol
+
+
+def _grid_cells(rect):
+    x0, y0, x1, y1 = rect
+    for gx in range(int(x0 // _NOTE_GRID), int(x1 // _NOTE_GRID) + 1):
+        for gy in range(int(y0 // _NOTE_GRID), int(y1 // _NOTE_GRID) + 1):
+            yield gx, gy
+
+
+# RAM-backed tmpfs for preview PDFs (Linux), used only with room to spare since
+# containers often mount a small /dev/shm
+_SHM_DIR = "/dev/shm"
+_SHM_MIN_FREE = 512 * 1024 * 1024
+
+
+def _preview_tmp_root() -> Optional[str]:
+    """Parent dir for the session's preview PDFs; None means the system temp dir."""
+    try:
+        if os.access(_SHM_DIR, os.W_OK) and shutil.disk_usage(_SHM_DIR).free >= _SHM_MIN_FREE:
+            return _SHM_DIR
+    except OSError:
+        pass
+    return None
+
+
+def _band_clip(fitz, page_rect, scale: float, band: int):
+    """Page-space rect of the TILE_HEIGHT-pixel horizontal band number `band` at `scale`."""
+    y0 = band * TILE_HEIGHT / scale
+    y1 = min((band + 1) * TILE_HEIGHT / scale, page_rect.y1)
+    return fitz.Rect(page_rect.x0, page_rect.y0 + y0, page_rect.x1, page_rect.y0 + y1)
+
+
+def _rasterize_pages_file(pdf_path: str, jobs: List[Tuple[int, float, int]], ppm: bool) -> list:
+    """Process-pool worker: render (page, scale, band) jobs from pdf_path.
+    Returns (idx, scale, band, y, w, h, stride, data) tuples; data is raw RGB samples,
+    or PPM bytes if ppm.
+    """
+    from highlights import _import_fitz
+
+    fitz = _import_fitz()
+    out = []
+    matrices = {}  # scale -> Matrix; a batch mostly shares one or two zooms
+    with fitz.open(pdf_path) as doc:
+        for idx, scale, band in jobs:
+            page = doc[idx]
+            mat = matrices.get(scale)
+            if mat is None:
+                mat = matrices[scale] = fitz.Matrix(scale, scale)
+            pix = page.get_pixmap(matrix=mat, colorspace=fitz.csRGB, alpha=False,
+                                  clip=_band_clip(fitz, page.rect, scale, band))
+            data = pix.tobytes("ppm") if ppm else pix.samples
+            out.append((idx, scale, band, pix.y, pix.width, pix.height, pix.stride, data))
+            # data is a copy: hand the band's MuPDF buffer back before rendering the next
+            del pix
+    return out
+
+
+def _splice_pages(base_pdf: str, part_pdf: str, pages: List[int], out_path: str) -> None:
+    """Write base_pdf to out_path with the given pages swapped for the same pages of part_pdf."""
+    from highlights import _import_fitz
+
+    fitz = _import_fitz()
+    with fitz.open(base_pdf) as doc, fitz.open(part_pdf) as part:
+        for i in pages:
+            doc.delete_page(i)
+            doc.insert_pdf(part, from_page=i, to_page=i, start_at=i)
+        doc.save(out_path, garbage=4, deflate=True)
+
+
+def _rasterize_pages_parallel(pdf_path: str, jobs: List[Tuple[int, float, int]], ppm: bool = False) -> list:
+    """Render many page bands at once, spread over one process per core (each opens its own doc)."""
+    workers = max(1, min(os.cpu_count() or 1, len(jobs)))
+    chunks = [jobs[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_rasterize_pages_file, pdf_path, chunk, ppm) for chunk in chunks]
+        return [r for f in futures for r in f.result()]
 
 
 class Step3Mixin:
@@ -22,18 +155,31 @@ class Step3Mixin:
             ttk.Button(tb, text="Next page ▶", command=self._next_page).pack(side="left", padx=4, pady=6)
     
             ttk.Button(tb, text="Refresh preview", command=self._refresh_preview).pack(side="left", padx=12)
+            self.preview_prog = ttk.Progressbar(tb, mode="indeterminate", length=80)
+            self.preview_prog.pack(side="left", padx=(0, 8))
             # Preview behavior toggles
             # Start with dragging enabled by default
             self.freeze_all_var = tk.BooleanVar(value=False)
             self.auto_refresh_var = tk.BooleanVar(value=AUTO_REFRESH_AFTER_DRAG)
+            # Mirrored into a plain attribute so mouse-up handlers don't round-trip to Tcl
+            self._auto_refresh = bool(AUTO_REFRESH_AFTER_DRAG)
+            self.auto_refresh_var.trace_add("write", self._on_auto_refresh_toggle)
             ttk.Checkbutton(tb, text="Freeze layout", variable=self.freeze_all_var).pack(side="left", padx=(8, 0))
             ttk.Checkbutton(tb, text="Auto-refresh after drag", variable=self.auto_refresh_var).pack(side="left", padx=(8, 0))
+            # When only rotations changed, auto-refresh redraws the outlines instead of the PDF
+            self.fast_rotate_var = tk.BooleanVar(value=FAST_ROTATE_PREVIEW)
+            ttk.Checkbutton(tb, text="Fast rotate preview", variable=self.fast_rotate_var).pack(side="left", padx=(8, 0))
+            # Kinds of edit ("geom", "rot") made since the last preview build started
+            self._preview_dirty = set()
     
             ttk.Label(tb, text="Export to:").pack(side="left", padx=(24, 6))
             self.export_var = tk.StringVar(value="annotated.pdf")
             ttk.Entry(tb, textvariable=self.export_var, width=40).pack(side="left", padx=4)
             ttk.Button(tb, text="Browse...", command=self._browse_export).pack(side="left", padx=4)
-            ttk.Button(tb, text="Export PDF", command=self._export_clicked).pack(side="right", padx=8)
+            self.export_btn = ttk.Button(tb, text="Export PDF", command=self._export_clicked)
+            self.export_btn.pack(side="right", padx=8)
+            self.export_prog = ttk.Progressbar(tb, mode="indeterminate", length=80)
+            self.export_prog.pack(side="right", padx=(0, 4))
     
             # Scrollable canvas
             outer = ttk.Frame(self.step3)
@@ -44,9 +190,14 @@ class Step3Mixin:
             self.canvas = tk.Canvas(outer, bg="#222", highlightthickness=0)
             self.vsb = ttk.Scrollbar(outer, orient="vertical", command=self.canvas.yview)
             self.hsb = ttk.Scrollbar(outer, orient="horizontal", command=self.canvas.xview)
-            self.canvas.configure(yscrollcommand=self.vsb.set, xscrollcommand=self.hsb.set)
+            self.canvas.configure(yscrollcommand=self._on_yscroll, xscrollcommand=self._on_xscroll)
+            # Raw Tcl entry point for the drag hot path (see _move_uid)
+            self._tk_call = self.canvas.tk.call
+            self._canvas_name = str(self.canvas)
     
             self.canvas.grid(row=0, column=0, sticky="nsew")
+            # Re-fit the page raster to the canvas width when the window is resized
+            self.canvas.bind("<Configure>", self._on_canvas_resize)
             self.vsb.grid(row=0, column=1, sticky="ns")
             self.hsb.grid(row=1, column=0, sticky="ew")
     
@@ -66,7 +217,12 @@ class Step3Mixin:
             self.canvas.tag_bind("pageimg", "<Double-Button-1>", self._on_double_click)
             self.canvas.tag_bind("pageimg", "<Double-1>", self._on_double_click)
     
-            # Context menu: right-click to edit text (and future actions)
+            # Context menu: right-click to edit text (and future actions). Built once; each
+            # popup only records which note it is for.
+            self._ctx_uid = None
+            self._ctx_menu = tk.Menu(self, tearoff=0)
+            self._ctx_menu.add_command(label="Edit text…", command=self._ctx_edit)
+            # Future: add rotate/reset or delete here
             self.canvas.bind("<Button-3>", self._on_right_click)
             self.canvas.tag_bind("note", "<Button-3>", self._on_right_click)
             self.canvas.tag_bind("note_rotated", "<Button-3>", self._on_right_click)
@@ -76,153 +232,731 @@ class Step3Mixin:
             self.canvas.tag_bind("note", "<Control-Button-1>", self._on_right_click)
             self.canvas.tag_bind("note_rotated", "<Control-Button-1>", self._on_right_click)
             self.canvas.tag_bind("pageimg", "<Control-Button-1>", self._on_right_click)
-            # Scroll wheel
-            self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
-            self.canvas.bind_all("<Button-4>", lambda e: self.canvas.yview_scroll(-2, "units"))
-            self.canvas.bind_all("<Button-5>", lambda e: self.canvas.yview_scroll(2, "units"))
+            # Scroll wheel: bound on the canvas only, so wheel ticks elsewhere don't scroll it
+            for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.canvas.bind(seq, self._on_mousewheel)
+            self._wheel_accum = 0.0  # unscrolled fraction of a unit from small wheel deltas
+            self._wheel_units = 0  # whole units queued for the next _flush_wheel
+            self._wheel_job = None
     
             self._drag_uid = None
             self._drag_dx = 0
             self._drag_dy = 0
+            self._drag_w = 0
+            self._drag_h = 0
+            # Geometry at mouse-down; a release without change skips the override and refresh
+            self._drag_start_rect = None
+            self._rotate_start_angle = None
+            # Per-drag constants read once at mouse-down instead of per motion event:
+            # the note rect while rotating, (min_w, min_h, page_w) while resizing
+            self._rotate_rect = None
+            self._resize_limits = None
+            self._rotate_drawn_angle = None  # angle of the live rotate outline on screen
+            # Latest unapplied motion point and its idle callback (see _on_drag)
+            self._pending_drag = None
+            self._drag_after_id = None
+            # Canvas-space position of the widget's (0, 0), i.e. canvasx(0)/canvasy(0); None
+            # once the view has scrolled. Lets pointer events be mapped without Tcl calls.
+            self._view_offset: Optional[Tuple[float, float]] = None
             # Selection / resize state
             self._selected_uid = None
             self._handle_id = None
             self._rotate_handle_id = None
+            # Bounds of the two handle ovals as last placed, for hit-testing without Tcl
+            self._handle_rect = None
+            self._rotate_handle_rect = None
+            # uid each handle item is currently tagged with
+            self._handle_uid = None
+            self._rotate_handle_uid = None
             self._resizing_uid = None
             self._resize_start_rect = None  # canvas coords [x0,y0,x1,y1]
             self._rotating_uid = None
             self._rotate_preview_id = None
-            self._rotate_refresh_job = None
+            # Raster zoom for the current page; canvas coords = PDF coords * _scale
+            self._scale = SCALE
+            self._inv_scale = 1.0 / SCALE  # canvas -> PDF coords, kept in step with _scale
+            self._resize_job = None
+            self._draw_job = None  # pending _request_draw_page callback
+            # Set while a draw waits for the canvas's first real size (see _draw_page)
+            self._draw_when_sized = False
+            # Pages are rasterized on worker threads in TILE_HEIGHT bands, only those in view.
+            # (page index, scale) -> {band: raster}; only the most recent few pages are kept.
+            # _doc_gen invalidates results for a replaced doc.
+            self._page_cache: "OrderedDict[Tuple[int, float], Dict[int, tuple]]" = OrderedDict()
+            self._raster_pending: set = set()  # (page index, scale, band)
+            self._tile_photos: Dict[int, object] = {}  # band -> PhotoImage shown on the canvas
+            self._tile_items: Dict[int, int] = {}  # band -> its canvas image item
+            # Tiles of the previous raster left up until their replacement band arrives
+            # (band -> (item, PhotoImage)); see _draw_page's in-place path
+            self._stale_tiles: Dict[int, tuple] = {}
+            # (page, scale, page px size, overlay signature) of the last full _draw_page
+            self._drawn_view = None
+            self._tiles_job = None
+            self._doc_lock = threading.Lock()
+            self._doc_gen = 0
+            # Band renders serialize on _doc_lock anyway: one long-lived worker, FIFO
+            self._raster_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anny-raster")
+            # Background preview builds: one in flight, later requests coalesce into one rerun
+            self._preview_in_flight = False
+            self._preview_pending = False
+            self._preview_cancel = threading.Event()  # set to abort the in-flight build
+            self._refresh_after_id = None
+            self._refresh_due = 0.0  # time.monotonic() deadline of the debounced refresh
+            # Digests of the inputs behind _preview_pdf_path (see _preview_keys)
+            self._last_preview_keys: Optional[Tuple[str, str, Dict[int, str]]] = None
+            # Recent preview builds, LRU: job digest -> (temp PDF path, _preview_keys result).
+            # Returning to an earlier state (e.g. dragging a note back) reopens its PDF.
+            self._preview_cache: "OrderedDict[str, Tuple[str, tuple]]" = OrderedDict()
+            # All preview PDFs of this session live here; _on_close removes the whole dir.
+            # Builds write a file and the viewer/raster workers reopen it, so keep it in RAM
+            self._preview_dir = tempfile.mkdtemp(prefix="anny-preview-", dir=_preview_tmp_root())
+            # uid -> canvas-space note rect, in draw order (last entry is topmost)
+            self._note_rects: Dict[str, Tuple[float, float, float, float]] = {}
+            # uid -> canvas item ids of its note rectangle / rotated outline, so drag
+            # handlers address items directly instead of find_withtag + gettags
+            self._note_ids: Dict[str, int] = {}
+            self._note_rot_ids: Dict[str, int] = {}
+            self._uid_by_item: Dict[int, str] = {}  # reverse of both maps above
+            # Overlay specs for notes not yet scrolled into view (see _materialize_notes)
+            self._deferred_items: list = []
+            # Grid cell -> uids whose rect touches it, and uid -> draw order (higher is on top)
+            self._note_grid: Dict[Tuple[int, int], List[str]] = {}
+            self._note_order: Dict[str, int] = {}
     
         # ---------- Preview building / drawing ----------
         def _planned_rect_map(self) -> Dict[str, Tuple[float, float, float, float]]:
-            return {p.uid: p.note_rect for p in self.placements}
+            # Straight from the _index_placements columns; no per-placement attribute reads
+            return dict(zip(self._pl_uids, self._pl_rects))
+    
+        def _fixed_rects_for_job(self) -> Dict[str, Tuple[float, float, float, float]]:
+            """fixed_note_rects for a build/export: a private copy, since workers read it off-thread."""
+            if getattr(self, "freeze_all_var", None) is not None and self.freeze_all_var.get():
+                # Freeze every note: the planned map is freshly built, so overlay edits in place
+                combined = self._planned_rect_map()
+                combined.update(self.fixed_overrides)
+                return combined
+            # Only force edited ones; let untouched notes auto-place
+            return dict(self.fixed_overrides)
+    
+        def _index_placements(self):
+            """Split self.placements into parallel columns plus a page -> rows index.
+            Call whenever self.placements is replaced, so per-page loops don't rescan
+            every placement or touch Python attributes per item.
+            """
+            self._pl_uids: List[str] = []
+            self._pl_queries: List[str] = []
+            self._pl_rects: List[Tuple[float, float, float, float]] = []
+            self._pl_rows_by_page: Dict[int, List[int]] = {}
+            self._pl_by_uid: Dict[str, object] = {}  # uid -> placement, for the text editor
+            for i, p in enumerate(self.placements):
+                self._pl_by_uid[p.uid] = p
+                self._pl_uids.append(p.uid)
+                self._pl_queries.append(p.query)
+                self._pl_rects.append(p.note_rect)
+                self._pl_rows_by_page.setdefault(p.page_index, []).append(i)
     
         def _build_exact_preview_pdf(self):
-            """Render a temporary annotated PDF (identical to export), then rasterize."""
+            """Render a temporary annotated PDF (identical to export) in a worker thread.
+            The result is opened and drawn on the Tk thread by _preview_ready.
+            """
             if not (self.ocr_pdf or self.src_pdf):
                 return
+            # Step 2 starts the build just before switching tabs
+            self._ensure_step3()
+            # Whichever build runs next reads the current state, so it covers every edit so far
+            self._preview_dirty.clear()
+            if self._preview_in_flight:
+                # Abort the superseded build at its next page/note, then rebuild once with
+                # the latest state (see _preview_ready)
+                self._preview_pending = True
+                self._preview_cancel.set()
+                return
             pdf_path = self.ocr_pdf or self.src_pdf
             settings = self._gather_settings()
+            combined = self._fixed_rects_for_job()
     
-            planned = self._planned_rect_map()
-            # Freeze all notes by default: pass all planned rects as fixed
-            if getattr(self, "freeze_all_var", None) is not None and self.freeze_all_var.get():
-                combined = {**planned, **self.fixed_overrides}
-            else:
-                # Only force edited ones; let untouched notes auto-place
-                combined = {**self.fixed_overrides}
-    
-            # temp file
-            fd, tmp = tempfile.mkstemp(suffix="_annot_preview.pdf")
-            os.close(fd)
-            self._preview_pdf_path = tmp
-    
-            # draw real PDF using the same engine/path as export
-            # Always freeze current placements for preview so edits (text/rotation/position)
-            # are accurately reflected without being reflowed by the auto-placer.
-            highlight_and_margin_comment_pdf(
+            # Snapshot the editable state so later UI edits don't race the worker
+            job = dict(
                 pdf_path=pdf_path,
-                queries=[],
-                comments={},
                 annotations_json=self.ann_json,
-                out_path=tmp,
-                fixed_note_rects=combined,
-                freeze_placements=self.placements,
-                note_rotations=self.rotation_overrides,
-                rotate_text_with_box=True,
-                note_text_overrides=self.note_text_overrides,
-                note_fontsize_overrides=self.note_fontsize_overrides,
-                **settings,
+                combined=combined,
+                placements=list(self.placements),
+                rotations=dict(self.rotation_overrides),
+                text_overrides=dict(self.note_text_overrides),
+                fontsize_overrides=dict(self.note_fontsize_overrides),
+                settings=settings,
             )
+            keys = self._preview_keys(job)
+            if (self._last_preview_keys is not None and keys[0] == self._last_preview_keys[0]
+                    and self._preview_pdf_path and os.path.exists(self._preview_pdf_path)):
+                # Nothing changed since the last build; the open doc is already current
+                return
+            cached = self._preview_cache.get(keys[0])
+            if cached is not None and os.path.exists(cached[0]):
+                self._preview_ready(result=cached[0], keys=cached[1])
+                return
+            splice = self._splice_plan(keys)
+            # Each build gets its own file; the open doc keeps reading its own
+            fd, out_path = tempfile.mkstemp(suffix="_annot_preview.pdf", dir=self._preview_dir)
+            os.close(fd)
+            self._preview_in_flight = True
+            self._preview_cancel = cancel = threading.Event()
+            self.preview_prog.start(10)
     
-            # open and rasterize
-            self._open_doc(tmp)
-            self._rasterize_pages()
-            self.cur_page = max(0, min(self.cur_page, len(self.page_imgs_ppm) - 1))
+            def worker():
+                try:
+                    tmp = self._render_preview_worker(out_path=out_path, should_cancel=cancel.is_set,
+                                                      splice=splice, **job)
+                except Exception as e:
+                    try:
+                        os.remove(out_path)
+                    except OSError:
+                        pass
+                    if isinstance(e, RenderCancelled):
+                        self.after(0, self._preview_ready)
+                        return
+                    err_msg = f"{type(e).__name__}: {e}"
+                    self.after(0, lambda m=err_msg: self._preview_ready(error=m))
+                    return
+                self.after(0, lambda p=tmp: self._preview_ready(result=p, keys=keys))
+    
+            threading.Thread(target=worker, daemon=True).start()
+    
+        @staticmethod
+        def _preview_keys(job: dict) -> Tuple[str, str, Dict[int, str]]:
+            """Digests of everything that feeds a preview build: (whole job, shared part, per page).
+            Notes are drawn on their own page, so a page whose digest is unchanged renders
+            identically and its cached raster survives the rebuild.
+            Input file stamps are included so an edited PDF/JSON still triggers a rebuild.
+            """
+            def digest(obj) -> str:
+                blob = json.dumps(obj, sort_keys=True, default=repr)
+                return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+    
+            stamps = []
+            for path in (job["pdf_path"], job["annotations_json"]):
+                try:
+                    st = os.stat(path)
+                    stamps.append((path, st.st_mtime_ns, st.st_size))
+                except (OSError, TypeError):
+                    stamps.append((path, None, None))
+            page_of = {}
+            per_page: Dict[int, list] = {}
+            for pl in job["placements"]:
+                page_of[pl.uid] = pl.page_index
+                per_page.setdefault(pl.page_index, []).append(("placement", repr(pl)))
+            for name in ("combined", "rotations", "text_overrides", "fontsize_overrides"):
+                for uid, val in job[name].items():
+                    per_page.setdefault(page_of.get(uid, -1), []).append((name, uid, repr(val)))
+            # Entries not tied to a known page count as shared state
+            base = digest([job["pdf_path"], job["annotations_json"], job["settings"], stamps,
+                           sorted(per_page.pop(-1, []))])
+            page_keys = {pg: digest([base, sorted(items)]) for pg, items in per_page.items()}
+            return digest([base, sorted(page_keys.items())]), base, page_keys
+    
+        def _splice_plan(self, keys) -> Optional[Tuple[str, List[int]]]:
+            """(open preview PDF, changed pages) when a build only needs to redo a few pages.
+            Freeze-mode pages are annotated independently, so pages whose digest is
+            unchanged can be copied from the open preview instead of re-rendered.
+            """
+            old, base_pdf = self._last_preview_keys, self._preview_pdf_path
+            if old is None or old[1] != keys[1] or not base_pdf or not os.path.exists(base_pdf):
+                return None
+            pages, old_pages = keys[2], old[2]
+            dirty = sorted(pg for pg in set(pages) | set(old_pages) if pages.get(pg) != old_pages.get(pg))
+            if not dirty or 2 * len(dirty) > self.page_count:
+                return None  # mostly changed: a full build is as cheap
+            return base_pdf, dirty
+    
+        @staticmethod
+        def _render_preview_worker(out_path, pdf_path, annotations_json, combined, placements, rotations,
+                                   text_overrides, fontsize_overrides, settings, should_cancel=None,
+                                   splice: Optional[Tuple[str, List[int]]] = None) -> str:
+            """Write the annotated preview PDF to out_path and return it.
+            With splice=(base_pdf, pages), only those pages are annotated and the rest are
+            copied from base_pdf (see _splice_plan).
+            Runs off the Tk thread, so it must not touch widgets or Tk variables.
+            """
+            target = os.path.splitext(out_path)[0] + "_part.pdf" if splice else out_path
+            try:
+                # draw real PDF using the same engine/path as export
+                # Always freeze current placements for preview so edits (text/rotation/position)
+                # are accurately reflected without being reflowed by the auto-placer.
+                highlight_and_margin_comment_pdf(
+                    pdf_path=pdf_path,
+                    queries=[],
+                    comments={},
+                    annotations_json=annotations_json,
+                    out_path=target,
+                    fixed_note_rects=combined,
+                    freeze_placements=placements,
+                    pages=(splice[1] if splice else None),
+                    note_rotations=rotations,
+                    rotate_text_with_box=True,
+                    note_text_overrides=text_overrides,
+                    note_fontsize_overrides=fontsize_overrides,
+                    subset_fonts=True,
+                    should_cancel=should_cancel,
+                    **settings,
+                )
+                if splice:
+                    _splice_pages(splice[0], target, splice[1], out_path)
+            finally:
+                if splice:
+                    try:
+                        os.remove(target)
+                    except OSError:
+                        pass
+            return out_path
+    
+        def _preview_ready(self, result: Optional[str] = None, error: Optional[str] = None,
+                           keys: Optional[Tuple[str, str, Dict[int, str]]] = None):
+            self._preview_in_flight = False
+            pending, self._preview_pending = self._preview_pending, False
+            self.preview_prog.stop()
+            if error:
+                self._last_preview_keys = None
+            elif result is not None and keys is not None:
+                self._remember_preview(keys, result)
+            if result is not None and not pending:
+                old_keys, self._last_preview_keys = self._last_preview_keys, keys
+                old_count, old_cache = self.page_count, list(self._page_cache.items())
+                self._preview_pdf_path = result
+                # open; pages are rasterized lazily by _draw_page
+                self._open_doc(result)
+                if old_keys is not None and keys is not None and self.page_count == old_count:
+                    # Keep rasters of pages this rebuild did not change
+                    _, old_base, old_pages = old_keys
+                    _, base, pages = keys
+                    for ck, raster in old_cache:
+                        if pages.get(ck[0], base) == old_pages.get(ck[0], old_base):
+                            self._page_cache[ck] = raster
+                self.cur_page = max(0, min(self.cur_page, self.page_count - 1))
+                self._request_draw_page()
+                self.after_idle(self._warm_page_cache)
+            if pending:
+                # Superseded (cancelled, or finished before noticing): don't show the stale
+                # result, build the latest state; it is reused from the cache if identical
+                self._build_exact_preview_pdf()
+            if error:
+                messagebox.showerror("Preview failed", error)
+    
+        def _remember_preview(self, keys, pdf_path: str):
+            self._preview_cache[keys[0]] = (pdf_path, keys)
+            self._preview_cache.move_to_end(keys[0])
+            while len(self._preview_cache) > PREVIEW_CACHE_SIZE:
+                _, (old_path, _) = self._preview_cache.popitem(last=False)
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
     
         def _open_doc(self, pdf_path: str):
-            if self.doc is not None:
+            with self._doc_lock:
+                if self.doc is not None:
+                    try:
+                        self.doc.close()
+                    except Exception:
+                        pass
+                self.doc = self.fitz.open(pdf_path)
+                self._doc_gen += 1
+                self.page_count = len(self.doc)
+                # Page geometry in PDF points, read in one pass without rasterizing
+                self.page_sizes = {i: (pg.rect.width, pg.rect.height) for i, pg in enumerate(self.doc)}
+            self._page_cache.clear()
+            self._raster_pending.clear()
+    
+        def _fit_scale(self, idx: int) -> float:
+            """Zoom that fits page idx to the canvas width, capped to [MIN_SCALE, SCALE].
+            Rounded down to a 1/_SCALE_STEPS step so small window resizes keep the same
+            zoom, and so the cached bands (keyed by scale) stay valid.
+            """
+            avail = self.canvas.winfo_width()
+            if avail <= 1:  # not mapped yet
+                return SCALE
+            page_w = self.page_sizes[idx][0] or 1.0
+            fit = math.floor(avail / page_w * _SCALE_STEPS) / _SCALE_STEPS
+            return max(MIN_SCALE, min(SCALE, fit))
+    
+        def _on_canvas_resize(self, e):
+            if self.doc is None:
+                return
+            if self._draw_when_sized:
+                # First layout of the Step 3 canvas: draw (and warm) now at the real fit zoom
+                self._draw_when_sized = False
+                self._request_draw_page()
+                self.after_idle(self._warm_page_cache)
+                return
+            if self._resize_job is not None:
                 try:
-                    self.doc.close()
+                    self.after_cancel(self._resize_job)
                 except Exception:
                     pass
-            self.doc = self.fitz.open(pdf_path)
+            self._resize_job = self.after(200, self._apply_canvas_resize)
+    
+        def _apply_canvas_resize(self):
+            self._resize_job = None
+            if self.doc is None or not self.page_count:
+                return
+            if self._fit_scale(self.cur_page) != self._scale:
+                self._request_draw_page()
+    
+        def _rasterize_page(self, idx: int, scale: float, band: int, gen: int):
+            """Rasterize one band of a preview page (worker thread).
+            Returns (image, y, w, h) where image is a PIL image wrapping the raw RGB
+            samples, or PPM bytes when Pillow is unavailable; None if the doc was replaced.
+            _show_tile later replaces the image with its PhotoImage in the cache.
+            """
+            with self._doc_lock:
+                if gen != self._doc_gen:
+                    return None
+                page = self.doc[idx]
+                pix = page.get_pixmap(matrix=self.fitz.Matrix(scale, scale), colorspace=self.fitz.csRGB,
+                                      alpha=False, clip=_band_clip(self.fitz, page.rect, scale, band))
+            if _PIL_AVAILABLE:
+                # Pillow can't map RGB buffers, so it copies either way; reading straight from
+                # MuPDF's memory (samples_mv) skips the intermediate bytes copy of pix.samples
+                img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+                return img, pix.y, pix.width, pix.height
+            return pix.tobytes("ppm"), pix.y, pix.width, pix.height
+    
+        def _page_bands(self, idx: int, scale: float, top: float = 0.0, bottom: Optional[float] = None) -> range:
+            """Bands of page idx at scale that overlap canvas rows [top, bottom] (default: first screenful)."""
+            n = max(1, math.ceil(self.page_sizes[idx][1] * scale / TILE_HEIGHT))
+            if bottom is None:
+                bottom = top + max(self.canvas.winfo_height(), 1)
+            first = max(0, int(top // TILE_HEIGHT))
+            return range(min(first, n - 1), min(n, int(bottom // TILE_HEIGHT) + 1))
+    
+        def _request_page(self, idx: int, scale: float, bands):
+            """Queue background rasterization of bands that aren't cached or already queued."""
+            cached = self._page_cache.get((idx, scale), {})
+            gen = self._doc_gen
+            for band in bands:
+                key = (idx, scale, band)
+                if band in cached or key in self._raster_pending:
+                    continue
+                self._raster_pending.add(key)
+                self._raster_pool.submit(self._raster_job, key, gen)
+    
+        def _raster_job(self, key: Tuple[int, float, int], gen: int):
+            try:
+                result = self._rasterize_page(*key, gen)
+            except Exception:
+                result = None
+            self.after(0, lambda r=result: self._page_rendered(key, gen, r))
+    
+        def _page_rendered(self, key: Tuple[int, float, int], gen: int, result):
+            if gen != self._doc_gen:
+                return
+            self._raster_pending.discard(key)
+            if result is None:
+                return
+            idx, scale, band = key
+            tiles = self._page_cache.setdefault((idx, scale), {})
+            tiles[band] = result
+            self._page_cache.move_to_end((idx, scale))
+            while len(self._page_cache) > PAGE_CACHE_SIZE:
+                self._page_cache.popitem(last=False)
+            if (idx, scale) == (self.cur_page, self._scale):
+                self._show_tile(band, tiles)
+    
+        def _show_tile(self, band: int, tiles: Dict[int, tuple]):
+            """Put a rendered band over the grey page placeholder, beneath the note overlays.
+            The first showing swaps the cached raster for its PhotoImage, so revisiting the
+            page reuses the Tk image instead of converting the pixels again.
+            """
+            if band in self._tile_photos:
+                return
+            img, y, w, h = tiles[band]
+            if isinstance(img, bytes):
+                # Name the format so Tk doesn't probe every image handler first
+                photo = tk.PhotoImage(data=img, format="ppm")
+            elif _PIL_AVAILABLE and isinstance(img, Image.Image):
+                photo = ImageTk.PhotoImage(img, master=self.canvas)
+            else:
+                photo = img  # converted on an earlier visit
+            tiles[band] = (photo, y, w, h)
+            self._tile_photos[band] = photo  # keep a ref
+            item = self.canvas.create_image(0, y, anchor="nw", image=photo, tags=("pageimg", "tile"))
+            self.canvas.tag_raise(item, "pageph")
+            self._tile_items[band] = item
+            stale = self._stale_tiles.pop(band, None)
+            if stale is not None:
+                self.canvas.delete(stale[0])
+    
+        def _on_xscroll(self, first, last):
+            self.hsb.set(first, last)
+            self._view_offset = None
+    
+        def _on_yscroll(self, first, last):
+            self.vsb.set(first, last)
+            self._view_offset = None
+            # Scrolling reveals new bands; coalesce bursts of scroll events into one pass
+            if self._tiles_job is None and self.doc is not None:
+                self._tiles_job = self.after_idle(self._request_visible_tiles)
+    
+        def _request_visible_tiles(self):
+            self._tiles_job = None
+            if self.doc is None or not self.page_count:
+                return
+            top = self.canvas.canvasy(0)
+            bottom = top + self.canvas.winfo_height()
+            # One band of margin each way so slow scrolling rarely shows the placeholder
+            bands = self._page_bands(self.cur_page, self._scale, top - TILE_HEIGHT, bottom + TILE_HEIGHT)
+            cached = self._page_cache.get((self.cur_page, self._scale), {})
+            for band in bands:
+                if band in cached:
+                    self._show_tile(band, cached)
+            self._request_page(self.cur_page, self._scale, bands)
+            self._materialize_notes(top - TILE_HEIGHT, bottom + TILE_HEIGHT)
+    
+        def _materialize_notes(self, top: Optional[float] = None, bottom: Optional[float] = None):
+            """Create canvas items for deferred notes overlapping canvas rows [top, bottom].
+            Geometry (_note_rects / grid) is kept for every note, so hit-testing and
+            selection work the same for notes that have no items yet.
+            """
+            if not self._deferred_items:
+                return
+            if top is None:
+                top = self.canvas.canvasy(0) - TILE_HEIGHT
+                bottom = top + self.canvas.winfo_height() + 2 * TILE_HEIGHT
+            # A note's rectangle and rotated outline are created together
+            show = {it[0] for it in self._deferred_items
+                    if max(it[2][1::2]) >= top and min(it[2][1::2]) <= bottom}
+            if not show:
+                return
+            now = [it for it in self._deferred_items if it[0] in show]
+            self._deferred_items = [it for it in self._deferred_items if it[0] not in show]
+            for (uid, kind, _, _), cid in zip(now, self._create_items(now)):
+                (self._note_ids if kind == "rectangle" else self._note_rot_ids)[uid] = cid
+                self._uid_by_item[cid] = uid
+            # New items stack on top; keep the selection handles above them
+            if self._handle_id is not None:
+                self.canvas.tag_raise("handle")
+            if self._rotate_handle_id is not None:
+                self.canvas.tag_raise("rotate_handle")
+    
+        def _warm_page_cache(self):
+            """Render the first screenful of the pages around cur_page in a process pool
+            after a cold open. Only worth the pool start-up for a handful of bands on a
+            multi-core machine; otherwise bands keep rendering on demand via _request_page.
+            """
+            if self.doc is None or not self._preview_pdf_path or (os.cpu_count() or 1) < 2:
+                return
+            if self._draw_when_sized:
+                return  # zoom unknown until the canvas is laid out; warmed from there
+            order = sorted(range(self.page_count), key=lambda i: abs(i - self.cur_page))
+            jobs = []
+            for idx in order[1:PAGE_CACHE_SIZE]:
+                scale = self._fit_scale(idx)
+                cached = self._page_cache.get((idx, scale), {})
+                for band in self._page_bands(idx, scale):
+                    key = (idx, scale, band)
+                    if band not in cached and key not in self._raster_pending:
+                        jobs.append(key)
+            if len(jobs) <= 4:
+                return
+            self._raster_pending.update(jobs)
+            gen, pdf_path = self._doc_gen, self._preview_pdf_path
+    
+            def worker():
+                try:
+                    results = _rasterize_pages_parallel(pdf_path, jobs, ppm=not _PIL_AVAILABLE)
+                except Exception:
+                    results = []
+                self.after(0, lambda r=results: self._pages_rendered(gen, jobs, r))
     
-        def _rasterize_pages(self):
-            self.page_imgs_ppm.clear()
-            self.page_sizes.clear()
-            mat = self.fitz.Matrix(SCALE, SCALE)
-            for i, page in enumerate(self.doc):
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                self.page_imgs_ppm[i] = pix.tobytes("ppm")
-                self.page_sizes[i] = (pix.width, pix.height)
+            threading.Thread(target=worker, daemon=True).start()
+    
+        def _pages_rendered(self, gen: int, jobs: List[Tuple[int, float, int]], results: list):
+            if gen != self._doc_gen:
+                return
+            for idx, scale, band, y, w, h, stride, data in results:
+                if _PIL_AVAILABLE:
+                    img = Image.frombuffer("RGB", (w, h), data, "raw", "RGB", stride, 1)
+                else:
+                    img = data
+                self._page_rendered((idx, scale, band), gen, (img, y, w, h))
+            # Jobs lost to a failed pool fall back to on-demand rendering
+            self._raster_pending.difference_update(jobs)
+    
+        def _prefetch_page(self, idx: int):
+            if self.doc is not None and 0 <= idx < self.page_count:
+                scale = self._fit_scale(idx)
+                self._request_page(idx, scale, self._page_bands(idx, scale))
+    
+        def _request_draw_page(self):
+            """Redraw the current page once the event queue drains. Back-to-back requests
+            (page flips, a resize landing with a preview rebuild) collapse into one draw.
+            """
+            if self._draw_job is None:
+                self._draw_job = self.after_idle(self._run_draw_page)
+    
+        def _run_draw_page(self):
+            self._draw_job = None
+            if self.doc is not None and self.page_count:
+                self._draw_page()
     
         def _draw_page(self):
+            if self.canvas.winfo_width() <= 1:
+                # Step 3 not laid out yet (preview built before the tab was shown): the fit
+                # zoom is unknown, so wait for the first <Configure> rather than render
+                # bands at a zoom that is replaced a moment later
+                self._draw_when_sized = True
+                return
+            sc = self._fit_scale(self.cur_page)
+            pw, ph = self.page_sizes[self.cur_page]
+            w, h = int(pw * sc), int(ph * sc)
+            items, rects, sig = self._overlay_specs(sc)
+            view = (self.cur_page, sc, (w, h), sig)
+            if view == self._drawn_view and rects.keys() == self._note_rects.keys() and not any(
+                    self._rect_changed(r, self._note_rects[uid]) for uid, r in rects.items()):
+                # Same page, zoom and notes as on screen (e.g. a rebuild after a drag):
+                # only the page raster changes. Keep the note items and selection, and
+                # leave the old tiles up until each replacement band arrives.
+                self._refresh_tiles(items)
+                return
             self.canvas.delete("all")
             # Any previous handle id becomes invalid after delete("all").
             self._handle_id = None
             self._rotate_handle_id = None
             self._rotate_preview_id = None
-            w, h = self.page_sizes[self.cur_page]
-            photo = tk.PhotoImage(data=self.page_imgs_ppm[self.cur_page])
-            self._photo = photo  # keep a ref
-            self.canvas.create_image(0, 0, anchor="nw", image=photo, tags=("pageimg",))
+            self._note_rects = {}
+            self._note_ids = {}
+            self._note_rot_ids = {}
+            self._uid_by_item = {}
+            self._deferred_items = []
+            self._note_grid = {}
+            self._note_order = {}
+            self._tile_photos = {}
+            self._tile_items = {}
+            self._stale_tiles = {}
+            self._drawn_view = view
+            self._scale = sc
+            self._inv_scale = 1.0 / sc
+            if (self.cur_page, sc) in self._page_cache:
+                self._page_cache.move_to_end((self.cur_page, sc))
+            # Lay out notes over a placeholder now; bands in view arrive via _page_rendered
+            self.canvas.create_rectangle(0, 0, w, h, fill="#e0e0e0", outline="", tags=("pageimg", "pageph"))
             self.canvas.config(scrollregion=(0, 0, w, h), width=min(w, 1200), height=min(h, 900))
+            self._view_offset = None  # a new scroll region can move the view
+            self._request_visible_tiles()
+    
+            for uid, rect in rects.items():
+                self._note_rects[uid] = rect
+                self._note_order[uid] = len(self._note_order)
+                self._grid_add(uid, rect)
+            # Only notes in (or near) the viewport get canvas items now; the rest on scroll
+            self._deferred_items = items
+            self._materialize_notes()
+            # if a selection exists on this page, show its resize handle
+            if self._selected_uid and self._rect_for_uid_canvas(self._selected_uid):
+                self._show_resize_handle(self._selected_uid)
+                self._show_rotate_handle(self._selected_uid)
     
+        def _overlay_specs(self, sc: float):
+            """Note overlays of the current page at zoom sc, without touching the canvas.
+            Returns (items, rects, sig): (uid, kind, coords, options) item specs, uid ->
+            canvas rect in draw order, and a signature of everything but the positions.
+            """
+            items = []  # (uid, kind, coords, options) created in one batch by _materialize_notes
+            rects: Dict[str, Tuple[float, float, float, float]] = {}
+            sig = []
             # overlay draggable boxes; draw rotated outline if this note has a rotation
-            for pl in [p for p in self.placements if p.page_index == self.cur_page]:
-                x0, y0, x1, y1 = self.fixed_overrides.get(pl.uid, pl.note_rect)
-                col = self.color_map.get(pl.query, "#ff9800")
-                cx0, cy0, cx1, cy1 = x0 * SCALE, y0 * SCALE, x1 * SCALE, y1 * SCALE
+            uids, page_rects, queries = self._pl_uids, self._pl_rects, self._pl_queries
+            fixed, color_map, rotations = self.fixed_overrides, self.color_map, self.rotation_overrides
+            for i in self._pl_rows_by_page.get(self.cur_page, ()):
+                uid = uids[i]
+                x0, y0, x1, y1 = fixed.get(uid, page_rects[i])
+                col = color_map.get(queries[i], "#ff9800")
+                cx0, cy0, cx1, cy1 = x0 * sc, y0 * sc, x1 * sc, y1 * sc
+                rects[uid] = (cx0, cy0, cx1, cy1)
+                tags = ("note", f"uid:{uid}")
+                # Most notes were never rotated: no angle to parse, just the visible box
+                ang = rotations.get(uid)
+                if ang is None:
+                    sig.append((uid, col, 0.0))
+                    items.append((uid, "rectangle", (cx0, cy0, cx1, cy1),
+                                  dict(outline=col, width=2, fill="", tags=tags)))
+                    continue
                 # persistent rotated preview outline if any rotation defined
-                ang = self.rotation_overrides.get(pl.uid)
                 try:
-                    angf = float(ang) if ang is not None else 0.0
+                    angf = float(ang) % 360.0
                 except Exception:
                     angf = 0.0
-                is_rotated = abs((angf % 360.0)) > 0.5
+                is_rotated = abs(angf) > 0.5
+                sig.append((uid, col, angf if is_rotated else 0.0))
     
                 # interactive axis-aligned rectangle (used for selection / dragging)
                 # If rotated, keep this invisible to avoid double outlines but still present for hit-testing.
-                self.canvas.create_rectangle(
-                    cx0, cy0, cx1, cy1,
+                items.append((uid, "rectangle", (cx0, cy0, cx1, cy1), dict(
                     outline=("" if is_rotated else col), width=(0 if is_rotated else 2), fill="",
-                    tags=("note", f"uid:{pl.uid}")
-                )
+                    tags=tags
+                )))
     
                 if is_rotated:
-                    cx = 0.5 * (cx0 + cx1)
-                    cy = 0.5 * (cy0 + cy1)
-                    pts = [(cx0, cy0), (cx1, cy0), (cx1, cy1), (cx0, cy1)]
-                    rad = (angf % 360.0) * math.pi / 180.0
-                    c, s = math.cos(rad), math.sin(rad)
-                    rpts = []
-                    for x, y in pts:
-                        dx, dy = x - cx, y - cy
-                        rx = cx + c * dx - s * dy
-                        ry = cy + s * dx + c * dy
-                        rpts.extend([rx, ry])
-                    self.canvas.create_polygon(
-                        *rpts,
+                    rpts = _rotated_corners(cx0, cy0, cx1, cy1, *_cos_sin(angf))
+                    items.append((uid, "polygon", rpts, dict(
                         fill="",
                         outline=col,
                         width=2,
-                        tags=("note_rotated", f"uid:{pl.uid}")
-                    )
-            # if a selection exists on this page, show its resize handle
-            if self._selected_uid and self._rect_for_uid_canvas(self._selected_uid):
-                self._show_resize_handle(self._selected_uid)
-                self._show_rotate_handle(self._selected_uid)
+                        tags=("note_rotated", f"uid:{uid}")
+                    )))
+            return items, rects, tuple(sig)
+    
+        def _refresh_tiles(self, items):
+            """Swap in the current page raster under the existing note items."""
+            for band, item in self._tile_items.items():
+                self._stale_tiles[band] = (item, self._tile_photos.get(band))
+            self._tile_items = {}
+            self._tile_photos = {}
+            # Specs of notes still without items are re-taken from this draw
+            self._deferred_items = [it for it in items if it[0] not in self._note_ids]
+            self._request_visible_tiles()
+    
+        def _create_items(self, items) -> List[int]:
+            """Create canvas items from (uid, kind, coords, options) in one Tcl script.
+            A page of notes costs one interpreter round-trip instead of one per item;
+            falls back to per-item creation if a value can't be quoted safely.
+            """
+            def word(v) -> str:
+                if isinstance(v, (int, float)):
+                    return repr(v)
+                if isinstance(v, (tuple, list)):
+                    return "{%s}" % " ".join(word(x) for x in v)
+                if _TCL_UNSAFE_WORD.search(str(v)):
+                    raise ValueError(v)
+                return "{%s}" % v
+    
+            if not items:
+                return []
+            try:
+                script = " ".join(
+                    "[%s create %s %s %s]" % (
+                        self.canvas, kind, " ".join(word(c) for c in coords),
+                        " ".join(f"-{k} {word(v)}" for k, v in opts.items()))
+                    for _, kind, coords, opts in items
+                )
+            except ValueError:
+                return [getattr(self.canvas, f"create_{kind}")(*coords, **opts) for _, kind, coords, opts in items]
+            return [int(x) for x in self.tk.splitlist(self.tk.eval("list " + script))]
     
         # ---------- paging ----------
         def _prev_page(self):
-            self.cur_page = (self.cur_page - 1) % len(self.page_imgs_ppm)
-            self._draw_page()
+            if not self.page_count:
+                return
+            self.cur_page = (self.cur_page - 1) % self.page_count
+            self._request_draw_page()
+            # warm the cache for the page the user is most likely to open next
+            self.after_idle(self._prefetch_page, (self.cur_page - 1) % self.page_count)
     
         def _next_page(self):
-            self.cur_page = (self.cur_page + 1) % len(self.page_imgs_ppm)
-            self._draw_page()
+            if not self.page_count:
+                return
+            self.cur_page = (self.cur_page + 1) % self.page_count
+            self._request_draw_page()
+            self.after_idle(self._prefetch_page, (self.cur_page + 1) % self.page_count)
     
         def _browse_export(self):
             p = filedialog.asksaveasfilename(
@@ -237,56 +971,91 @@ class Step3Mixin:
         def _find_uid_at(self, x, y) -> Optional[str]:
             """Return uid for the topmost note whose rectangle contains (x,y).
             Falls back to a small overlap tolerance for border clicks.
-            Coordinates must be canvas-space (use canvasx/canvasy).
+            Coordinates must be canvas-space (see _to_canvas).
             """
-            # Prefer interior hit: check all note rectangles whose bbox contains the point
-            note_items = list(self.canvas.find_withtag("note"))
-            containing = []
-            for obj in note_items:
-                coords = self.canvas.coords(obj)
-                if not coords or len(coords) < 4:
-                    continue
-                x0, y0, x1, y1 = coords[:4]
+            # Prefer interior hit: only notes sharing the pointer's grid cell are tested,
+            # with no Tcl coords()/gettags() round-trip per note item. Buckets are in draw
+            # order, so the first hit walking back from the end is the topmost note.
+            rects, order = self._note_rects, self._note_order
+            for uid in reversed(self._note_grid.get((int(x // _NOTE_GRID), int(y // _NOTE_GRID)), ())):
+                x0, y0, x1, y1 = rects[uid]
                 if x0 <= x <= x1 and y0 <= y <= y1:
-                    containing.append(obj)
-    
-            if containing:
-                # pick topmost among containing
-                for obj in reversed(self.canvas.find_all()):
-                    if obj in containing:
-                        for t in self.canvas.gettags(obj):
-                            if t.startswith("uid:"):
-                                return t[4:]
-                # fallback just in case tags missing
-                obj = containing[-1]
-                for t in self.canvas.gettags(obj):
-                    if t.startswith("uid:"):
-                        return t[4:]
-    
-            # Fallback: small tolerance around pointer to catch border-only clicks
+                    return uid
+    
+            # Fallback: small tolerance around pointer to catch border-only clicks. Boxes
+            # are checked from the grid cells the tolerance square touches; only rotated
+            # outlines, which the grid doesn't describe, need the canvas to hit-test.
             tol = 4
-            hits = self.canvas.find_overlapping(x - tol, y - tol, x + tol, y + tol)
-            for obj in reversed(hits):  # topmost first
-                for t in self.canvas.gettags(obj):
-                    if t.startswith("uid:"):
-                        return t[4:]
+            near = None
+            for cell in _grid_cells((x - tol, y - tol, x + tol, y + tol)):
+                for uid in self._note_grid.get(cell, ()):
+                    if _near_rect(rects[uid], x, y, tol) and (near is None or order[uid] > order[near]):
+                        near = uid
+            if near is not None or not self._note_rot_ids:
+                return near
+            return self._uid_for_items(self.canvas.find_overlapping(x - tol, y - tol, x + tol, y + tol))
+    
+        def _uid_for_items(self, items) -> Optional[str]:
+            """uid of the topmost note item among canvas item ids (no per-item gettags)."""
+            for obj in reversed(items):
+                uid = self._uid_by_item.get(obj)
+                if uid is not None:
+                    return uid
             return None
     
+        def _grid_add(self, uid, rect):
+            order = self._note_order
+            for cell in _grid_cells(rect):
+                bucket = self._note_grid.setdefault(cell, [])
+                if not bucket or order[bucket[-1]] < order[uid]:
+                    bucket.append(uid)  # _draw_page adds in draw order
+                else:
+                    bisect.insort(bucket, uid, key=order.__getitem__)  # re-added after a move
+    
+        def _grid_remove(self, uid, rect):
+            for cell in _grid_cells(rect):
+                bucket = self._note_grid.get(cell)
+                if bucket and uid in bucket:
+                    bucket.remove(uid)
+    
         def _rect_for_uid_canvas(self, uid):
-            for obj in self.canvas.find_withtag(f"uid:{uid}"):
-                if "note" in self.canvas.gettags(obj):
-                    return self.canvas.coords(obj)  # [x0,y0,x1,y1]
-            return None
+            # _note_rects mirrors the note item's coords (only _move_uid changes them)
+            rect = self._note_rects.get(uid)
+            return list(rect) if rect is not None else None  # [x0,y0,x1,y1]
     
         def _move_uid(self, uid, x0, y0, x1, y1):
-            for obj in self.canvas.find_withtag(f"uid:{uid}"):
-                if "note" in self.canvas.gettags(obj):
-                    self.canvas.coords(obj, x0, y0, x1, y1)
+            """Reposition the existing canvas items for uid in place (no redraw)."""
+            prev = self._note_rects.get(uid)
+            cid = self._note_ids.get(uid)
+            # Called per motion event: go straight to Tcl, skipping Canvas.coords/move's
+            # argument flattening and result conversion (their return values are unused)
+            if cid is not None:
+                self._tk_call(self._canvas_name, "coords", cid, x0, y0, x1, y1)
+            rot_id = self._note_rot_ids.get(uid)
+            if rot_id is not None and prev is not None:
+                # keep the rotated outline centred on the box it belongs to
+                dx = 0.5 * ((x0 + x1) - (prev[0] + prev[2]))
+                dy = 0.5 * ((y0 + y1) - (prev[1] + prev[3]))
+                self._tk_call(self._canvas_name, "move", rot_id, dx, dy)
+            if prev is not None:
+                self._note_rects[uid] = (x0, y0, x1, y1)
+                self._grid_remove(uid, prev)
+                self._grid_add(uid, (x0, y0, x1, y1))
             # update handle if this uid is selected
             if self._selected_uid == uid:
                 self._update_handle_position()
                 self._update_rotate_handle_position()
     
+        def _set_note_state(self, uid, state):
+            """Show or hide uid's overlay items (its box and any rotated outline) by id,
+            with no tag search."""
+            for item in (self._note_ids.get(uid), self._note_rot_ids.get(uid)):
+                if item is not None:
+                    try:
+                        self._tk_call(self._canvas_name, "itemconfigure", item, "-state", state)
+                    except tk.TclError:
+                        pass
+    
         # ---------- selection / resize handle ----------
         def _clear_selection(self):
             self._selected_uid = None
@@ -303,7 +1072,7 @@ class Step3Mixin:
                     pass
             self._rotate_handle_id = None
     
-        def _show_resize_handle(self, uid):
+        def _show_resize_handle(self, uid, move_item=None):
             rect = self._rect_for_uid_canvas(uid)
             if not rect:
                 self._clear_selection()
@@ -311,6 +1080,14 @@ class Step3Mixin:
             x0, y0, x1, y1 = rect
             r = 6  # radius in px
             hx0, hy0, hx1, hy1 = x1 - r, y0 - r, x1 + r, y0 + r
+            # Skip canvas writes that wouldn't change anything (e.g. the corner didn't move)
+            moved = (hx0, hy0, hx1, hy1) != self._handle_rect
+            self._handle_rect = (hx0, hy0, hx1, hy1)
+            # Coords alone only when the handle already belongs to uid; otherwise retag it
+            if move_item is not None and uid == self._handle_uid:
+                if moved:
+                    self._tk_call(self._canvas_name, "coords", move_item, hx0, hy0, hx1, hy1)
+                return
             if self._handle_id is None:
                 self._handle_id = self.canvas.create_oval(
                     hx0, hy0, hx1, hy1,
@@ -320,37 +1097,44 @@ class Step3Mixin:
             else:
                 # The stored id may be invalid if canvas was cleared; recreate on failure.
                 try:
-                    self.canvas.coords(self._handle_id, hx0, hy0, hx1, hy1)
-                    # retag to current uid
-                    self.canvas.itemconfig(self._handle_id, tags=("handle", f"uid:{uid}"))
+                    if moved:
+                        self.canvas.coords(self._handle_id, hx0, hy0, hx1, hy1)
+                    if uid != self._handle_uid:
+                        # retag to current uid
+                        self.canvas.itemconfig(self._handle_id, tags=("handle", f"uid:{uid}"))
                 except Exception:
                     self._handle_id = self.canvas.create_oval(
                         hx0, hy0, hx1, hy1,
                         fill="#ffffff", outline="#333333", width=1.0,
                         tags=("handle", f"uid:{uid}")
                     )
-            # make sure handle is on top
-            try:
-                self.canvas.tag_raise(self._handle_id)
-            except Exception:
-                pass
+            # No tag_raise: the handle is created after the page's notes and only moved
+            # since; _materialize_notes raises it over notes created later
+            self._handle_uid = uid
     
         def _update_handle_position(self):
             if self._selected_uid and self._handle_id is not None:
-                self._show_resize_handle(self._selected_uid)
+                self._move_handle(self._handle_id, self._selected_uid, self._show_resize_handle)
+    
+        def _move_handle(self, item, uid, show):
+            """Follow a drag of the selected note: only the handle's coords change (its tags
+            and stacking are unchanged), so it is one Tcl call per motion event. show()
+            places the handle and stores its bounds; it retags the item when uid isn't the
+            note the handle was last placed for, and reruns fully if the item is gone.
+            """
+            try:
+                show(uid, item)
+            except tk.TclError:
+                show(uid)
     
         def _hit_handle(self, x, y) -> Optional[str]:
-            tol = 6
-            for obj in self.canvas.find_overlapping(x - tol, y - tol, x + tol, y + tol):
-                tags = self.canvas.gettags(obj)
-                if tags and "handle" in tags:
-                    for t in tags:
-                        if t.startswith("uid:"):
-                            return t[4:]
+            # The note the handle was last placed for (what its uid: tag says)
+            if self._handle_id is not None and _near_rect(self._handle_rect, x, y, 6):
+                return self._handle_uid
             return None
     
         # ---------- rotate handle ----------
-        def _show_rotate_handle(self, uid):
+        def _show_rotate_handle(self, uid, move_item=None):
             rect = self._rect_for_uid_canvas(uid)
             if not rect:
                 return
@@ -359,6 +1143,12 @@ class Step3Mixin:
             offset = 14  # pixels above top edge
             r = 5
             hx0, hy0, hx1, hy1 = cx - r, y0 - offset - r, cx + r, y0 - offset + r
+            moved = (hx0, hy0, hx1, hy1) != self._rotate_handle_rect
+            self._rotate_handle_rect = (hx0, hy0, hx1, hy1)
+            if move_item is not None and uid == self._rotate_handle_uid:
+                if moved:
+                    self._tk_call(self._canvas_name, "coords", move_item, hx0, hy0, hx1, hy1)
+                return
             if self._rotate_handle_id is None:
                 self._rotate_handle_id = self.canvas.create_oval(
                     hx0, hy0, hx1, hy1,
@@ -367,56 +1157,60 @@ class Step3Mixin:
                 )
             else:
                 try:
-                    self.canvas.coords(self._rotate_handle_id, hx0, hy0, hx1, hy1)
-                    self.canvas.itemconfig(self._rotate_handle_id, tags=("rotate_handle", f"uid:{uid}"))
+                    if moved:
+                        self.canvas.coords(self._rotate_handle_id, hx0, hy0, hx1, hy1)
+                    if uid != self._rotate_handle_uid:
+                        self.canvas.itemconfig(self._rotate_handle_id, tags=("rotate_handle", f"uid:{uid}"))
                 except Exception:
                     self._rotate_handle_id = self.canvas.create_oval(
                         hx0, hy0, hx1, hy1,
                         fill="#ffffff", outline="#333333", width=1.0,
                         tags=("rotate_handle", f"uid:{uid}")
                     )
-            try:
-                self.canvas.tag_raise(self._rotate_handle_id)
-            except Exception:
-                pass
+            self._rotate_handle_uid = uid
     
         def _update_rotate_handle_position(self):
             if self._selected_uid and self._rotate_handle_id is not None:
-                self._show_rotate_handle(self._selected_uid)
+                self._move_handle(self._rotate_handle_id, self._selected_uid, self._show_rotate_handle)
     
         def _hit_rotate_handle(self, x, y) -> Optional[str]:
-            tol = 6
-            for obj in self.canvas.find_overlapping(x - tol, y - tol, x + tol, y + tol):
-                tags = self.canvas.gettags(obj)
-                if tags and "rotate_handle" in tags:
-                    for t in tags:
-                        if t.startswith("uid:"):
-                            return t[4:]
+            # Selecting another note doesn't move this handle, so it may still be on an earlier one
+            if self._rotate_handle_id is not None and _near_rect(self._rotate_handle_rect, x, y, 6):
+                return self._rotate_handle_uid
             return None
     
+        def _to_canvas(self, x, y) -> Tuple[float, float]:
+            """Widget coords -> canvas coords. The view offset is read from Tk once per
+            scroll position instead of two canvasx/canvasy calls per event.
+            """
+            off = self._view_offset
+            if off is None:
+                off = self._view_offset = (self.canvas.canvasx(0), self.canvas.canvasy(0))
+            return x + off[0], y + off[1]
+    
         def _on_down(self, e):
             # Convert to canvas coordinates to respect scrolling
-            cx, cy = self.canvas.canvasx(e.x), self.canvas.canvasy(e.y)
+            cx, cy = self._to_canvas(e.x, e.y)
             # Rotation handle hit?
             r_uid = self._hit_rotate_handle(cx, cy)
             if r_uid:
                 self._rotating_uid = r_uid
+                self._rotate_start_angle = self.rotation_overrides.get(r_uid)
+                # The box doesn't move while it is turned
+                self._rotate_rect = self._rect_for_uid_canvas(r_uid)
+                self._rotate_drawn_angle = None
                 self._selected_uid = r_uid
                 self._show_resize_handle(r_uid)
                 self._show_rotate_handle(r_uid)
-                # Hide the axis-aligned rectangle while rotating to avoid duplicate visuals
-                try:
-                    for obj in self.canvas.find_withtag(f"uid:{r_uid}"):
-                        if "note" in self.canvas.gettags(obj):
-                            self.canvas.itemconfigure(obj, state='hidden')
-                except Exception:
-                    pass
+                # Hide the note's own outlines while rotating to avoid duplicate visuals
+                self._set_note_state(r_uid, "hidden")
                 return
             # Prioritize resize handle hit
             h_uid = self._hit_handle(cx, cy)
             if h_uid:
                 self._resizing_uid = h_uid
                 self._resize_start_rect = self._rect_for_uid_canvas(h_uid)
+                self._resize_limits = self._resize_limits_for_page()
                 self._selected_uid = h_uid
                 return
             uid = self._find_uid_at(cx, cy)
@@ -432,12 +1226,37 @@ class Step3Mixin:
                 x0, y0, x1, y1 = rect
                 self._drag_dx = cx - x0
                 self._drag_dy = cy - y0
+                # Size is fixed while moving; no per-motion lookup needed
+                self._drag_w = x1 - x0
+                self._drag_h = y1 - y0
+                self._drag_start_rect = rect
+            else:
+                self._drag_uid = None
     
         def _on_drag(self, e):
-            cx, cy = self.canvas.canvasx(e.x), self.canvas.canvasy(e.y)
+            # Coalesce motion: keep only the latest point and apply it once per idle pass
+            self._pending_drag = self._to_canvas(e.x, e.y)
+            if self._drag_after_id is None:
+                self._drag_after_id = self.after_idle(self._apply_drag)
+    
+        def _flush_drag(self):
+            """Apply a queued motion now (before mouse-up reads the final position)."""
+            if self._drag_after_id is not None:
+                try:
+                    self.after_cancel(self._drag_after_id)
+                except Exception:
+                    pass
+                self._apply_drag()
+    
+        def _apply_drag(self):
+            self._drag_after_id = None
+            if self._pending_drag is None:
+                return
+            cx, cy = self._pending_drag
+            self._pending_drag = None
             # Rotating?
             if self._rotating_uid:
-                rect = self._rect_for_uid_canvas(self._rotating_uid)
+                rect = self._rotate_rect
                 if rect:
                     x0, y0, x1, y1 = rect
                     cx0 = 0.5 * (x0 + x1)
@@ -446,16 +1265,16 @@ class Step3Mixin:
                     # Normalize angle to [0,360)
                     ang = (ang + 360.0) % 360.0
                     self.rotation_overrides[self._rotating_uid] = ang
-                    # Update rotate handle and show a live rotated polygon preview
-                    self._update_rotate_handle_position()
+                    last = self._rotate_drawn_angle
+                    if last is not None and abs((ang - last + 180.0) % 360.0 - 180.0) < 0.5:
+                        return  # under half a degree: the outline wouldn't visibly move
+                    self._rotate_drawn_angle = ang
+                    # Show a live rotated polygon preview (the handles follow the unrotated
+                    # box, which doesn't move while rotating)
                     self._update_rotate_preview_polygon(self._rotating_uid, rect, ang)
     
                     # If auto-refresh is enabled, throttle preview rebuilds during drag
-                    try:
-                        do_auto = bool(self.auto_refresh_var.get())
-                    except Exception:
-                        do_auto = bool(AUTO_REFRESH_AFTER_DRAG)
-                    if do_auto:
+                    if self._auto_refresh:
                         self._schedule_rotate_preview_refresh()
                 return
             # Resizing has priority
@@ -463,21 +1282,12 @@ class Step3Mixin:
                 x0, y0, x1, y1 = self._resize_start_rect
                 # Anchor bottom-left (x0,y1); move top-right to cursor
                 # Enforce minimum width/height
-                try:
-                    min_w = float(self.min_width_var.get()) * SCALE
-                except Exception:
-                    min_w = float(DEFAULTS.get("min_note_width", 48)) * SCALE
-                try:
-                    fs = float(self.fontsize_var.get())
-                except Exception:
-                    fs = float(DEFAULTS.get("note_fontsize", 9.0))
-                min_h = max(18.0, (2 * fs + 8.0)) * SCALE
+                min_w, min_h, W = self._resize_limits
     
                 new_x1 = max(cx, x0 + min_w)
                 new_y0 = min(cy, y1 - min_h)
     
                 # Clamp within page
-                W, H = self.page_sizes[self.cur_page]
                 new_x1 = min(new_x1, W)
                 new_y0 = max(new_y0, 0)
     
@@ -488,18 +1298,15 @@ class Step3Mixin:
                 return
             x0 = cx - self._drag_dx
             y0 = cy - self._drag_dy
-            rect = self._rect_for_uid_canvas(self._drag_uid)
-            if not rect:
-                return
-            w = rect[2] - rect[0]
-            h = rect[3] - rect[1]
-            self._move_uid(self._drag_uid, x0, y0, x0 + w, y0 + h)
+            self._move_uid(self._drag_uid, x0, y0, x0 + self._drag_w, y0 + self._drag_h)
     
         def _on_up(self, e):
+            self._flush_drag()
             # Finish rotation
             if self._rotating_uid:
                 uid = self._rotating_uid
                 self._rotating_uid = None
+                self._rotate_rect = None
                 # Clear any live rotated preview polygon
                 if self._rotate_preview_id is not None:
                     try:
@@ -507,102 +1314,106 @@ class Step3Mixin:
                     except Exception:
                         pass
                     self._rotate_preview_id = None
-                # Unhide the axis-aligned rectangle for the selected uid
-                try:
-                    for obj in self.canvas.find_withtag(f"uid:{uid}"):
-                        if "note" in self.canvas.gettags(obj):
-                            self.canvas.itemconfigure(obj, state='normal')
-                except Exception:
-                    pass
-                try:
-                    do_auto = bool(self.auto_refresh_var.get())
-                except Exception:
-                    do_auto = bool(AUTO_REFRESH_AFTER_DRAG)
-                if do_auto:
-                    self._refresh_preview()
+                self._set_note_state(uid, "normal")
+                if self.rotation_overrides.get(uid) == self._rotate_start_angle:
+                    return  # handle clicked but not turned
+                self._preview_dirty.add("rot")
+                if self._auto_refresh:
+                    self._schedule_refresh()
                 return
             # If resizing, finalize
             if self._resizing_uid:
                 rect = self._rect_for_uid_canvas(self._resizing_uid)
-                if rect:
-                    x0, y0, x1, y1 = rect
-                    self.fixed_overrides[self._resizing_uid] = (x0 / SCALE, y0 / SCALE, x1 / SCALE, y1 / SCALE)
-                self._resizing_uid = None
+                start = self._resize_start_rect
                 self._resize_start_rect = None
-                try:
-                    do_auto = bool(self.auto_refresh_var.get())
-                except Exception:
-                    do_auto = bool(AUTO_REFRESH_AFTER_DRAG)
-                if do_auto:
-                    self._refresh_preview()
+                self._resize_limits = None
+                if not rect or not self._rect_changed(rect, start):
+                    self._resizing_uid = None
+                    return
+                x0, y0, x1, y1 = rect
+                inv = self._inv_scale
+                self.fixed_overrides[self._resizing_uid] = (x0 * inv, y0 * inv, x1 * inv, y1 * inv)
+                self._resizing_uid = None
+                self._preview_dirty.add("geom")
+                if self._auto_refresh:
+                    self._schedule_refresh()
                 return
     
             if not self._drag_uid:
                 return
             rect = self._rect_for_uid_canvas(self._drag_uid)
-            if rect:
-                x0, y0, x1, y1 = rect
-                self.fixed_overrides[self._drag_uid] = (x0 / SCALE, y0 / SCALE, x1 / SCALE, y1 / SCALE)
+            if not rect or not self._rect_changed(rect, self._drag_start_rect):
+                # Plain click (selection only): nothing to pin, nothing to rebuild
+                self._drag_uid = None
+                return
+            x0, y0, x1, y1 = rect
+            inv = self._inv_scale
+            self.fixed_overrides[self._drag_uid] = (x0 * inv, y0 * inv, x1 * inv, y1 * inv)
             self._drag_uid = None
+            self._preview_dirty.add("geom")
             # Respect UI toggle; default off for smoother interactions
+            if self._auto_refresh:
+                self._schedule_refresh()
+    
+        def _resize_limits_for_page(self) -> Tuple[float, float, float]:
+            """Canvas-space (min width, min height, page width) for a resize on this page."""
             try:
-                do_auto = bool(self.auto_refresh_var.get())
+                min_w = float(self.min_width_var.get()) * self._scale
             except Exception:
-                do_auto = bool(AUTO_REFRESH_AFTER_DRAG)
-            if do_auto:
-                self._refresh_preview()
+                min_w = float(DEFAULTS.get("min_note_width", 48)) * self._scale
+            try:
+                fs = float(self.fontsize_var.get())
+            except Exception:
+                fs = float(DEFAULTS.get("note_fontsize", 9.0))
+            min_h = max(18.0, (2 * fs + 8.0)) * self._scale
+            return min_w, min_h, self.page_sizes[self.cur_page][0] * self._scale
+    
+        def _on_auto_refresh_toggle(self, *_):
+            self._auto_refresh = bool(self.auto_refresh_var.get())
+    
+        @staticmethod
+        def _rect_changed(rect, start) -> bool:
+            """True unless rect matches start within half a canvas pixel."""
+            if start is None:
+                return True
+            return not all(math.isclose(a, b, abs_tol=0.5) for a, b in zip(rect, start))
     
         # ---------- rotation preview helpers ----------
         def _update_rotate_preview_polygon(self, uid: str, rect: List[float], ang_deg: float):
             """Draw or update a rotated polygon preview for the given rect at angle.
             rect is canvas coords [x0,y0,x1,y1].
+            Runs per motion event while rotating: after the first call it only moves the
+            polygon (one Tcl call, whole-pixel coords).
             """
             if not rect or len(rect) < 4:
                 return
-            x0, y0, x1, y1 = rect
-            cx = 0.5 * (x0 + x1)
-            cy = 0.5 * (y0 + y1)
-            pts = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
-            rad = (ang_deg % 360.0) * math.pi / 180.0
-            c, s = math.cos(rad), math.sin(rad)
-            rpts = []
-            for x, y in pts:
-                dx, dy = x - cx, y - cy
-                rx = cx + c * dx - s * dy
-                ry = cy + s * dx + c * dy
-                rpts.extend([rx, ry])
+            # Rounded to 1/100 degree so the drag's nearby angles share cache entries;
+            # the outline is snapped to whole pixels anyway
+            c, s = _cos_sin(round(ang_deg % 360.0, 2))
+            rpts = [round(v) for v in _rotated_corners(*rect[:4], c, s)]
+    
+            if self._rotate_preview_id is not None:
+                try:
+                    self._tk_call(self._canvas_name, "coords", self._rotate_preview_id, *rpts)
+                    return
+                except tk.TclError:
+                    pass  # item gone (canvas cleared); recreate below
     
             # Determine outline color from the note rectangle item (if available)
             outline = "#ff9800"
             try:
-                for obj in self.canvas.find_withtag(f"uid:{uid}"):
-                    if "note" in self.canvas.gettags(obj):
-                        outline = self.canvas.itemcget(obj, "outline") or outline
-                        break
+                if uid in self._note_ids:
+                    outline = self.canvas.itemcget(self._note_ids[uid], "outline") or outline
             except Exception:
                 pass
-    
-            if self._rotate_preview_id is None:
-                # Transparent fill, just an outline
-                self._rotate_preview_id = self.canvas.create_polygon(
-                    *rpts,
-                    fill="",
-                    outline=outline,
-                    width=2,
-                    tags=("rotate_preview", f"uid:{uid}")
-                )
-            else:
-                try:
-                    self.canvas.coords(self._rotate_preview_id, *rpts)
-                    self.canvas.itemconfig(self._rotate_preview_id, outline=outline, tags=("rotate_preview", f"uid:{uid}"))
-                except Exception:
-                    self._rotate_preview_id = self.canvas.create_polygon(
-                        *rpts,
-                        fill="",
-                        outline=outline,
-                        width=2,
-                        tags=("rotate_preview", f"uid:{uid}")
-                    )
+            # Transparent fill, just an outline
+            self._rotate_preview_id = self.canvas.create_polygon(
+                *rpts,
+                fill="",
+                outline=outline,
+                width=2,
+                tags=("rotate_preview", f"uid:{uid}")
+            )
             try:
                 self.canvas.tag_raise(self._rotate_preview_id)
             except Exception:
@@ -610,32 +1421,77 @@ class Step3Mixin:
     
         def _schedule_rotate_preview_refresh(self, delay_ms: int = 220):
             """Throttle heavy preview rebuilds during rotation by debouncing.
-            Always cancel any pending job and schedule one trailing update.
+            Shares _schedule_refresh's timer, so a rotation and a drag in quick
+            succession still yield a single trailing rebuild. Documents with many
+            notes rebuild slowly, so they wait for a longer pause.
             """
-            # Cancel any pending refresh to achieve trailing-edge debounce
-            if self._rotate_refresh_job is not None:
-                try:
-                    self.after_cancel(self._rotate_refresh_job)
-                except Exception:
-                    pass
-                self._rotate_refresh_job = None
-    
-            def _do():
-                self._rotate_refresh_job = None
-                self._refresh_preview()
-            try:
-                self._rotate_refresh_job = self.after(delay_ms, _do)
-            except Exception:
-                # If scheduling fails, do an immediate refresh as fallback
-                self._refresh_preview()
+            if len(self.placements) > 100:
+                delay_ms = max(delay_ms, 350)
+            self._preview_dirty.add("rot")
+            self._schedule_refresh(delay_ms)
     
         def _on_mousewheel(self, event):
-            delta = int(-1 * (event.delta / 120))
-            self.canvas.yview_scroll(delta, "units")
+            if event.num == 4:  # X11 wheel up
+                units = -2
+            elif event.num == 5:  # X11 wheel down
+                units = 2
+            elif event.delta:
+                # Windows reports multiples of 120; trackpads send small deltas, so keep
+                # the fractional remainder instead of truncating it to zero
+                self._wheel_accum -= event.delta / 120.0
+                units = int(self._wheel_accum)
+                if not units:
+                    return
+                self._wheel_accum -= units
+            else:
+                return
+            # Wheel/trackpad bursts arrive faster than redraws; scroll once per idle pass
+            self._wheel_units += units
+            if self._wheel_job is None:
+                self._wheel_job = self.after_idle(self._flush_wheel)
+    
+        def _flush_wheel(self):
+            units, self._wheel_units = self._wheel_units, 0
+            self._wheel_job = None
+            if units:
+                self.canvas.yview_scroll(units, "units")
+                self._view_offset = None
     
         def _refresh_preview(self):
+            # An explicit refresh covers any debounced one still waiting
+            self._cancel_scheduled_refresh()
             self._build_exact_preview_pdf()
-            self._draw_page()
+    
+        def _schedule_refresh(self, delay_ms: int = 150):
+            """Debounce drag-triggered rebuilds: a burst of edits yields one refresh.
+            Called per motion event while rotating, so an already pending timer just has
+            its deadline pushed back rather than being cancelled and re-created.
+            """
+            self._refresh_due = time.monotonic() + delay_ms / 1000.0
+            if self._refresh_after_id is None:
+                self._refresh_after_id = self.after(delay_ms, self._do_refresh)
+    
+        def _cancel_scheduled_refresh(self):
+            if self._refresh_after_id is not None:
+                try:
+                    self.after_cancel(self._refresh_after_id)
+                except Exception:
+                    pass
+                self._refresh_after_id = None
+    
+        def _do_refresh(self):
+            self._refresh_after_id = None
+            wait_ms = int((self._refresh_due - time.monotonic()) * 1000)
+            if wait_ms > 0:
+                # More edits arrived since the timer was set: wait out the quiet period
+                self._refresh_after_id = self.after(wait_ms, self._do_refresh)
+                return
+            if self._preview_dirty == {"rot"} and self.fast_rotate_var.get():
+                # Rotation-only edits: show the new angles as note outlines over the current
+                # raster; the PDF is rebuilt by the next other edit or "Refresh preview"
+                self._request_draw_page()
+                return
+            self._refresh_preview()
     
         # ---------- text editing ----------
         def _uid_from_point(self, cx: float, cy: float) -> Optional[str]:
@@ -649,38 +1505,36 @@ class Step3Mixin:
             """
             # 1) Item under cursor if any
             try:
-                cur = self.canvas.find_withtag("current")
-                if cur:
-                    tags = self.canvas.gettags(cur[0])
-                    for t in tags:
-                        if t.startswith("uid:"):
-                            return t[4:]
+                uid = self._uid_for_items(self.canvas.find_withtag("current"))
+                if uid:
+                    return uid
             except Exception:
                 pass
     
-            # 2) Geometric test against our placements (handles interior clicks)
+            # 2) Geometric test against the notes drawn on this page (handles interior
+            # clicks). An unrotated note can only contain the point if it sits in the
+            # point's grid cell; rotated ones may poke out of their cells, so test them all.
             cand = None
             best_area = None
-            for pl in [p for p in self.placements if p.page_index == self.cur_page]:
-                try:
-                    x0, y0, x1, y1 = self.fixed_overrides.get(pl.uid, pl.note_rect)
-                except Exception:
-                    continue
-                cx0, cy0, cx1, cy1 = x0 * SCALE, y0 * SCALE, x1 * SCALE, y1 * SCALE
-                # center
-                mx = 0.5 * (cx0 + cx1)
-                my = 0.5 * (cy0 + cy1)
-                # inverse-rotate the click point by note rotation
+            rects, rotations = self._note_rects, self.rotation_overrides
+            uids = set(self._note_grid.get((int(cx // _NOTE_GRID), int(cy // _NOTE_GRID)), ()))
+            uids.update(u for u in rotations if u in rects)
+            for uid in sorted(uids, key=self._note_order.__getitem__):  # ties go to the first drawn
+                cx0, cy0, cx1, cy1 = rects[uid]
+                # inverse-rotate the click point by note rotation; no override means 0 degrees
+                ra = rotations.get(uid)
                 ang = 0.0
-                try:
-                    ra = self.rotation_overrides.get(pl.uid)
-                    if ra is not None:
-                        ang = float(ra)
-                except Exception:
-                    ang = 0.0
-                if abs((ang % 360.0)) > 0.5:
-                    rad = - (ang % 360.0) * math.pi / 180.0  # inverse
-                    c, s = math.cos(rad), math.sin(rad)
+                if ra is not None:
+                    try:
+                        ang = float(ra) % 360.0
+                    except Exception:
+                        ang = 0.0
+                if ang > 0.5:
+                    c, s = _cos_sin(ang)
+                    s = -s  # inverse rotation
+                    # center
+                    mx = 0.5 * (cx0 + cx1)
+                    my = 0.5 * (cy0 + cy1)
                     dx, dy = cx - mx, cy - my
                     rx = mx + c * dx - s * dy
                     ry = my + s * dx + c * dy
@@ -689,7 +1543,7 @@ class Step3Mixin:
                 if (cx0 <= rx <= cx1) and (cy0 <= ry <= cy1):
                     area = (cx1 - cx0) * (cy1 - cy0)
                     if best_area is None or area < best_area:
-                        cand = pl.uid
+                        cand = uid
                         best_area = area
             if cand:
                 return cand
@@ -697,14 +1551,9 @@ class Step3Mixin:
             # 3) Expand search radius around the click and pick topmost hit
             for tol in (1, 3, 6, 10):
                 try:
-                    hits = self.canvas.find_overlapping(cx - tol, cy - tol, cx + tol, cy + tol)
-                    for obj in reversed(hits):
-                        tags = self.canvas.gettags(obj)
-                        if not tags:
-                            continue
-                        for t in tags:
-                            if t.startswith("uid:"):
-                                return t[4:]
+                    uid = self._uid_for_items(self.canvas.find_overlapping(cx - tol, cy - tol, cx + tol, cy + tol))
+                    if uid:
+                        return uid
                 except Exception:
                     pass
     
@@ -715,11 +1564,11 @@ class Step3Mixin:
             """Return canvas coordinates (cx, cy) for a mouse event regardless of widget."""
             try:
                 if e.widget is self.canvas:
-                    return self.canvas.canvasx(e.x), self.canvas.canvasy(e.y)
+                    return self._to_canvas(e.x, e.y)
                 # Map global pointer position to canvas coordinates
                 x = self.winfo_pointerx() - self.canvas.winfo_rootx()
                 y = self.winfo_pointery() - self.canvas.winfo_rooty()
-                return self.canvas.canvasx(x), self.canvas.canvasy(y)
+                return self._to_canvas(x, y)
             except Exception:
                 return 0.0, 0.0
     
@@ -737,17 +1586,21 @@ class Step3Mixin:
             if not uid:
                 best_uid = None
                 best_d2 = None
-                for pl in [p for p in self.placements if p.page_index == self.cur_page]:
-                    try:
-                        x0, y0, x1, y1 = self.fixed_overrides.get(pl.uid, pl.note_rect)
-                    except Exception:
-                        continue
-                    mx = 0.5 * (x0 + x1) * SCALE
-                    my = 0.5 * (y0 + y1) * SCALE
+                # A note whose centre is within 64 px has that centre, and so part of its box,
+                # in a grid cell touching the 128 px square around the click; only those are
+                # candidates. _note_rects holds this page's boxes already in canvas space.
+                rects = self._note_rects
+                near = set()
+                for cell in _grid_cells((cx - 64, cy - 64, cx + 64, cy + 64)):
+                    near.update(self._note_grid.get(cell, ()))
+                for uid_i in sorted(near, key=self._note_order.__getitem__):  # ties: first drawn
+                    x0, y0, x1, y1 = rects[uid_i]
+                    mx = 0.5 * (x0 + x1)
+                    my = 0.5 * (y0 + y1)
                     dx = mx - cx; dy = my - cy
                     d2 = dx*dx + dy*dy
                     if (best_d2 is None) or (d2 < best_d2):
-                        best_d2 = d2; best_uid = pl.uid
+                        best_d2 = d2; best_uid = uid_i
                 # use if reasonably close (within ~64 px)
                 if best_uid is not None and (best_d2 is None or best_d2 <= (64*64)):
                     uid = best_uid
@@ -765,19 +1618,9 @@ class Step3Mixin:
                 return
             self._selected_uid = uid
             self._show_resize_handle(uid)
-            # Build and show a simple context menu
+            # Show the context menu for this note
+            self._ctx_uid = uid
             try:
-                if hasattr(self, "_ctx_menu") and self._ctx_menu is not None:
-                    try:
-                        self._ctx_menu.destroy()
-                    except Exception:
-                        pass
-                self._ctx_menu = tk.Menu(self, tearoff=0)
-                self._ctx_menu.add_command(
-                    label="Edit text…",
-                    command=lambda u=uid: self._open_text_editor(u)
-                )
-                # Future: add rotate/reset or delete here
                 x_root = self.winfo_pointerx()
                 y_root = self.winfo_pointery()
                 try:
@@ -788,13 +1631,12 @@ class Step3Mixin:
                 # Fallback: open editor directly
                 self._open_text_editor(uid)
     
+        def _ctx_edit(self):
+            if self._ctx_uid:
+                self._open_text_editor(self._ctx_uid)
+    
         def _open_text_editor(self, uid: str):
-            # find placement
-            pl = None
-            for p in self.placements:
-                if getattr(p, 'uid', None) == uid:
-                    pl = p
-                    break
+            pl = self._pl_by_uid.get(uid)
             if pl is None:
                 return
     
@@ -907,47 +1749,64 @@ class Step3Mixin:
     
             pdf_path = self.ocr_pdf or self.src_pdf
             settings = self._gather_settings()
-            planned = self._planned_rect_map()
-            if getattr(self, "freeze_all_var", None) is not None and self.freeze_all_var.get():
-                combined = {**planned, **self.fixed_overrides}
-            else:
-                combined = {**self.fixed_overrides}
+            combined = self._fixed_rects_for_job()
     
-            try:
-                # Always freeze current placements and rotations when exporting so the
-                # PDF reflects the user's interactive edits precisely.
-                out, hi, no, sk = highlight_and_margin_comment_pdf(
-                    pdf_path=pdf_path,
-                    queries=[],
-                    comments={},
-                    annotations_json=self.ann_json,
-                    out_path=self.export_var.get().strip(),
-                    fixed_note_rects=combined,
-                    freeze_placements=self.placements,
-                    note_rotations=self.rotation_overrides,
-                    rotate_text_with_box=True,
-                    note_text_overrides=self.note_text_overrides,
-                    note_fontsize_overrides=self.note_fontsize_overrides,
-                    **settings,
-                )
-            except Exception as e:
-                messagebox.showerror("Export failed", f"{type(e).__name__}: {e}")
-                return
+            # Snapshot the editable state; the UI stays live while the worker writes the PDF
+            job = dict(
+                pdf_path=pdf_path,
+                annotations_json=self.ann_json,
+                out_path=self.export_var.get().strip(),
+                fixed_note_rects=combined,
+                freeze_placements=list(self.placements),
+                note_rotations=dict(self.rotation_overrides),
+                note_text_overrides=dict(self.note_text_overrides),
+                note_fontsize_overrides=dict(self.note_fontsize_overrides),
+            )
+            self.export_btn.state(["disabled"])
+            self.export_prog.start(10)
     
+            def worker():
+                try:
+                    # Always freeze current placements and rotations when exporting so the
+                    # PDF reflects the user's interactive edits precisely.
+                    out, hi, no, sk = highlight_and_margin_comment_pdf(
+                        queries=[],
+                        comments={},
+                        rotate_text_with_box=True,
+                        **job,
+                        **settings,
+                    )
+                except Exception as e:
+                    err_msg = f"{type(e).__name__}: {e}"
+                    self.after(0, lambda m=err_msg: self._export_done(error=m))
+                    return
+                self.after(0, lambda r=(out, hi, no, sk): self._export_done(result=r))
+    
+            threading.Thread(target=worker, daemon=True).start()
+    
+        def _export_done(self, result: Optional[tuple] = None, error: Optional[str] = None):
+            self.export_prog.stop()
+            self.export_btn.state(["!disabled"])
+            if error:
+                messagebox.showerror("Export failed", error)
+                return
+            out, hi, no, sk = result
             messagebox.showinfo("Done", f"Saved: {out}\nHighlights={hi}  Notes={no}  Skipped={sk}")
     
         # ---------- cleanup ----------
         def _on_close(self):
-            try:
-                if self.doc is not None:
-                    self.doc.close()
-            except Exception:
-                pass
-            if self._preview_pdf_path and os.path.exists(self._preview_pdf_path):
+            if not self._step3_built:
+                self.destroy()
+                return
+            self._raster_pool.shutdown(wait=False, cancel_futures=True)
+            with self._doc_lock:  # wait out any in-flight rasterization
+                self._doc_gen += 1
                 try:
-                    os.remove(self._preview_pdf_path)
+                    if self.doc is not None:
+                        self.doc.close()
                 except Exception:
                     pass
+            shutil.rmtree(self._preview_dir, ignore_errors=True)
             self.destroy()
     
     
@@ -3,15 +3,23 @@
 # Python 3.8+ | Works across multiple PyMuPDF (pymupdf) versions.
 
 from pathlib import Path
-from typing import Tuple, Union, Sequence, Optional, List, Dict, Callable
+from typing import Tuple, Union, Sequence, Optional, List, Dict, Callable, Collection
 from collections import defaultdict
 import textwrap
 import json
 
 from dataclasses import dataclass
+import functools
 import hashlib
 import math
 
+# Optional faster JSON parser for annotation files; stdlib json also accepts bytes
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - optional dependency
+    _json_loads = json.loads
+
 
 # --- ADD: data model for one planned note ---
 @dataclass
@@ -25,6 +33,9 @@ class NotePlacement:
     leader_from: Optional[Tuple[float, float]]       # start point (box edge midpoint) or None
     leader_to: Optional[Tuple[float, float]]         # end point (block edge midpoint) or None
 
+class RenderCancelled(Exception):
+    """Raised by highlight_and_margin_comment_pdf when should_cancel() asks it to stop."""
+
 def _rect_tuple(r) -> Tuple[float, float, float, float]:
     """Normalize a rectangle-like value into an (x0, y0, x1, y1) tuple.
 
@@ -177,12 +188,26 @@ def _sanitize_punct(s: str) -> str:
              .replace("“", '"').replace("”", '"')
              .replace("—", "-").replace("–", "-"))
 
-def _font_object(fontname: Optional[str], fontfile: Optional[str]):
-    """Return a fitz.Font object if possible (prefer file), else None."""
+@functools.lru_cache(maxsize=8)
+def _font_bytes_cached(path: str, mtime_ns: int, size: int) -> bytes:
+    # mtime_ns/size only key the cache, so a regenerated font is read again
+    return Path(path).read_bytes()
+
+
+def _font_bytes(fontfile: Union[str, Path]) -> bytes:
+    """Read a TTF/OTF once per version of the file; every note of every build
+    reuses the buffer."""
+    p = Path(fontfile).resolve()
+    st = p.stat()
+    return _font_bytes_cached(str(p), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=16)
+def _font_object_cached(fontname: Optional[str], path: Optional[str], mtime_ns: int, size: int):
     fitz = _import_fitz()
     try:
-        if fontfile and Path(fontfile).exists():
-            return fitz.Font(file=str(fontfile))
+        if path:
+            return fitz.Font(fontbuffer=_font_bytes_cached(path, mtime_ns, size))
     except Exception:
         pass
     try:
@@ -195,6 +220,28 @@ def _font_object(fontname: Optional[str], fontfile: Optional[str]):
     except Exception:
         return None
 
+
+def _font_object(fontname: Optional[str], fontfile: Optional[str]):
+    """Return a fitz.Font object if possible (prefer file), else None.
+    Cached per (fontname, resolved path, mtime_ns, size): parsing the font is the
+    costly part, and an edited or newly created file gets a fresh entry."""
+    path, mtime_ns, size = None, 0, 0
+    if fontfile:
+        try:
+            p = Path(fontfile).resolve()
+            st = p.stat()
+            path, mtime_ns, size = str(p), st.st_mtime_ns, st.st_size
+        except OSError:
+            pass  # missing file: the fallback is cached without the path
+    return _font_object_cached(fontname, path, mtime_ns, size)
+
+def _subset_doc_fonts(doc) -> None:
+    """Subset embedded fonts in place; a no-op on PyMuPDF builds without support."""
+    try:
+        doc.subset_fonts()
+    except Exception:
+        pass
+
 def _wrap_with_font_metrics(text: str, width: float, fontsize: float,
                             font_obj, get_len_fallback, tightness=0.96,
                             line_height_factor=1.18):
@@ -245,12 +292,12 @@ def _register_font_alias(doc, page, fontfile: Union[str, Path], alias: str = "cu
     p = Path(fontfile)
     if not p.exists():
         return None
-    fontfile = str(p.resolve())
+    fontbuffer = _font_bytes(p)
 
     # Newer API
     try:
         if hasattr(doc, "insert_font"):
-            doc.insert_font(fontname=alias, fontfile=fontfile)
+            doc.insert_font(fontname=alias, fontbuffer=fontbuffer)
             return alias
     except Exception:
         pass
@@ -258,7 +305,7 @@ def _register_font_alias(doc, page, fontfile: Union[str, Path], alias: str = "cu
     # Older API (some PyMuPDF builds expose it on Page)
     try:
         if hasattr(page, "insert_font"):
-            page.insert_font(fontname=alias, fontfile=fontfile)
+            page.insert_font(fontname=alias, fontbuffer=fontbuffer)
             return alias
     except Exception:
         pass
@@ -921,10 +968,10 @@ def _expand_variants_preserving(d: Dict[str, any]) -> Dict[str, any]:
     return out
 
 # ---------------- annotations JSON loader ----------------
-def load_annotations_json(json_path: Union[str, Path]) -> List[Dict[str, str]]:
-    p = Path(json_path)
-    with p.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+@functools.lru_cache(maxsize=8)
+def _load_annotations_cached(path: str, mtime_ns: int, size: int) -> Tuple[Dict[str, str], ...]:
+    # mtime_ns/size only key the cache, so an edited file is parsed again
+    data = _json_loads(Path(path).read_bytes())
 
     if isinstance(data, dict):
         data = [data]
@@ -943,9 +990,33 @@ def load_annotations_json(json_path: Union[str, Path]) -> List[Dict[str, str]]:
             "explanation": str(row.get("explanation", f"Note: {q}")),
             "color": row.get("color")
         })
-    if not items:
+    return tuple(items)
+
+
+def load_annotations_json(json_path: Union[str, Path]) -> List[Dict[str, str]]:
+    """Parsed annotation rows; re-reads the file only when it changes (every preview
+    build and export loads the same JSON)."""
+    p = Path(json_path)
+    st = p.stat()
+    rows = _load_annotations_cached(str(p.resolve()), st.st_mtime_ns, st.st_size)
+    if not rows:
         raise ValueError("No valid items found in annotations JSON.")
-    return items
+    # Copy so callers can't mutate the cached rows
+    return [dict(it) for it in rows]
+
+
+@functools.lru_cache(maxsize=8)
+def _annotation_colors_cached(path: str, mtime_ns: int, size: int) -> Dict[str, Optional[str]]:
+    return {row["quote"]: row["color"] for row in _load_annotations_cached(path, mtime_ns, size)}
+
+
+def load_annotation_colors(json_path: Union[str, Path]) -> Dict[str, Optional[str]]:
+    """quote -> color as written in the annotations JSON (None when unset).
+    Served from the same cached parse as load_annotations_json."""
+    p = Path(json_path)
+    st = p.stat()
+    # Copy so callers can't mutate the cached map
+    return dict(_annotation_colors_cached(str(p.resolve()), st.st_mtime_ns, st.st_size))
 
 # ---------------- main ----------------
 def highlight_and_margin_comment_pdf(
@@ -996,11 +1067,17 @@ def highlight_and_margin_comment_pdf(
     emit_callback=None,
     # Freeze mode: draw exactly given placements; skip search/auto-placement
     freeze_placements: Optional[List[NotePlacement]] = None,
+    # Freeze mode only: annotate just these page indices, leave the others untouched
+    pages: Optional[Collection[int]] = None,
     note_rotations: Optional[Dict[str, float]] = None,
     rotate_text_with_box: bool = False,
     # Per-note style overrides (by uid)
     note_text_overrides: Optional[Dict[str, Union[str, Color]]] = None,
     note_fontsize_overrides: Optional[Dict[str, float]] = None,
+    # Embed only the glyphs actually used (smaller output, faster save and reopen)
+    subset_fonts: bool = False,
+    # Polled once per page/note; returning True aborts with RenderCancelled
+    should_cancel: Optional[Callable[[], bool]] = None,
 ):
     """
     When plan_only=False (default):
@@ -1117,6 +1194,11 @@ def highlight_and_margin_comment_pdf(
     out_path = Path(out_path) if out_path else pdf_path.with_name(pdf_path.stem + "_annotated.pdf")
     doc = fitz.open(pdf_path)
 
+    def _check_cancel():
+        if should_cancel is not None and should_cancel():
+            doc.close()
+            raise RenderCancelled()
+
     metric_fontname = _ensure_metrics_font(doc, note_fontname, note_fontfile)
     if debug:
         print(f"[font] metric_fontname={metric_fontname} file={note_fontfile}")
@@ -1132,6 +1214,9 @@ def highlight_and_margin_comment_pdf(
     if freeze_placements is not None:
         # 1) Draw highlights by searching only (does not affect placements)
         for page in doc:
+            if pages is not None and page.number not in pages:
+                continue
+            _check_cancel()
             page_hits = []
             for q in qlist:
                 hits = _search_page(page, q, flags)
@@ -1171,6 +1256,9 @@ def highlight_and_margin_comment_pdf(
         # 2) Draw note boxes + text exactly at provided rectangles (or overrides)
         total_notes = 0
         for pl in freeze_placements:
+            if pages is not None and int(pl.page_index) not in pages:
+                continue
+            _check_cancel()
             try:
                 page = doc[int(pl.page_index)]
             except Exception:
@@ -1271,6 +1359,8 @@ def highlight_and_margin_comment_pdf(
             total_notes += 1
 
         if not plan_only:
+            if subset_fonts:
+                _subset_doc_fonts(doc)
             doc.save(out_path, deflate=True, garbage=4)
             doc.close()
             return str(out_path), 0, total_notes, 0
@@ -1298,6 +1388,7 @@ def highlight_and_margin_comment_pdf(
         return bands[0]
 
     for page in doc:
+        _check_cancel()
         page_box = page.rect
         blocks_idx = _blocks_index(fitz, page)
         text_rects = _text_rects_padded(fitz, page)
@@ -1561,6 +1652,8 @@ def highlight_and_margin_comment_pdf(
 
     # ---------- finalize ----------
     if not plan_only:
+        if subset_fonts:
+            _subset_doc_fonts(doc)
         doc.save(out_path, deflate=True, garbage=4)
         doc.close()
         return str(out_path), total_hits, total_notes, total_skipped
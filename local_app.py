@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import base64
 import json
+import multiprocessing
 import os
 import tempfile
 import threading
@@ -1626,6 +1627,10 @@ def _start_webview_flow() -> tuple[Optional[str], Optional[str]]:
 
 
 def main():
+    # The frozen (PyInstaller) app enters here via main.py. OCR and preview rendering
+    # use process pools, whose workers re-run this executable; freeze_support() turns
+    # those runs into workers instead of new copies of the app. No-op when not frozen.
+    multiprocessing.freeze_support()
     # Prefer the modern web UI when pywebview is available.
     # Set ANNOTATE_USE_MODERN=0 to force legacy Tk.
     env_modern = os.environ.get("ANNOTATE_USE_MODERN", "").strip().lower()